@@ -1,75 +1,104 @@
 #!/usr/bin/env python3
 """
-Grid search over hyperparameters for EEGNet training.
+Hyperparameter search for EEGNet training using Optuna (TPE + median pruning).
 Searches: window_length, num_noise, num_folds, stride
+Replaces the old exhaustive 72-combination grid: the TPE sampler concentrates
+trials near promising regions and the MedianPruner kills bad trials after the
+first folds instead of running all num_folds.
 """
 
 import os
 import sys
-import itertools
-import pandas as pd
+import heapq
+import json
+import threading
+import types
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import gc
 import torch
+import optuna
 from shared_utils import utils
-from pipeline_kf_func import pipeline
+from pipeline_kf_func import pipeline, PipelineContext
 import shutil
 
-# Define hyperparameter grid
-PARAM_GRID = {
+# Search space (same values the old grid enumerated)
+SEARCH_SPACE = {
     "window_length": [125, 150, 200, 250],
     "num_noise": [4, 6, 8],
     "num_folds": [3, 5, 7],
     "stride": [12, 18],
 }
 
+N_TRIALS = 20
 TOP_K_MODELS = 5  # Only keep top 5 models
 
+# Model-dir deletions are I/O-bound and can take seconds to minutes on network
+# filesystems; run them off the training critical path
+_rm_pool = ThreadPoolExecutor(max_workers=2)
 
-def run_grid_search(base_config_path, output_dir="grid_search_results"):
-    """
-    Run grid search over hyperparameters.
 
-    Args:
-        base_config_path: Path to base YAML config file
-        output_dir: Directory to store results
+def _pin_worker_gpu(gpu_ids):
+    """Pool initializer: bind this worker process to one GPU for its lifetime.
+
+    torch only reads CUDA_VISIBLE_DEVICES at the first CUDA init in a
+    process, and pool workers persist across trials — so the variable must be
+    set exactly once, before any task runs. Setting it per task would be
+    silently ignored as soon as a worker had touched CUDA, letting two
+    workers land on the same physical device.
     """
-    # Load base config
-    base_config = utils.read_config(base_config_path)
+    os.environ["CUDA_VISIBLE_DEVICES"] = str(gpu_ids.get())
 
-    # Create output directory
-    os.makedirs(output_dir, exist_ok=True)
 
-    # Generate all combinations
-    param_names = list(PARAM_GRID.keys())
-    param_values = [PARAM_GRID[name] for name in param_names]
-    combinations = list(itertools.product(*param_values))
+def _run_pipeline_on_gpu(config, model_name):
+    """Worker-process entry: the initializer already pinned this worker to
+    one GPU, so the trial sees exactly one device."""
+    from pipeline_kf_func import pipeline as worker_pipeline
 
-    print(f"Starting grid search with {len(combinations)} combinations...")
-    print(f"Parameters: {param_names}")
-    print("=" * 80)
+    worker_pipeline(config, model_name=model_name, train_kf=True)
 
-    results = []
 
-    for idx, params in enumerate(combinations):
-        # Create param dict
-        param_dict = dict(zip(param_names, params))
+def make_objective(base_config, executor=None,
+                   trial_cache=None, cache_path=None, ctx=None):
+    """Build the Optuna objective closed over the base config.
 
-        print(f"\n[{idx + 1}/{len(combinations)}] Testing parameters:")
+    With executor set, each trial runs the pipeline in a worker subprocess;
+    the pool has one worker per GPU, each pinned at spawn, so any free worker
+    is a free device (trials are embarrassingly parallel). Per-fold pruning
+    only applies in serial mode where the pipeline runs in-process and can
+    report to the trial.
+    """
+
+    def objective(trial):
+        # Sample param dict
+        param_dict = {
+            name: trial.suggest_categorical(name, values)
+            for name, values in SEARCH_SPACE.items()
+        }
+
+        print(f"\n[trial {trial.number}] Testing parameters:")
         for name, value in param_dict.items():
             print(f"  {name}: {value}")
 
-        # Modify config
-        config = base_config.copy()
-        config["dataset_generator"]["window_length"] = param_dict["window_length"]
-        config["augmentation"]["window_length"] = param_dict["window_length"]
-        config["augmentation"]["num_noise"] = param_dict["num_noise"]
-        config["augmentation"]["stride"] = param_dict["stride"]
-        config["partition"]["num_folds"] = param_dict["num_folds"]
-        config["training"]["num_folds"] = param_dict["num_folds"]
-        config["model"]["window_length"] = param_dict["window_length"]
+        # Trial cache: if the sampler revisits an already-evaluated point
+        # (or we resumed after a crash), reuse the stored result
+        cache_key = json.dumps(sorted(param_dict.items()))
+        if trial_cache is not None and cache_key in trial_cache:
+            cached = trial_cache[cache_key]
+            print(f"  → Cache hit, reusing result ({cached['mean_val_acc']:.4f})")
+            trial.set_user_attr("model_name", cached["model_name"])
+            trial.set_user_attr("model_dir", cached["model_dir"])
+            trial.set_user_attr("max_val_acc", cached["max_val_acc"])
+            trial.set_user_attr("mean_train_acc", cached["mean_train_acc"])
+            trial.set_user_attr("cache_hit", True)
+            return cached["mean_val_acc"]
+
+        # Build the trial config by path-copying only the overridden sections;
+        # base_config itself is frozen and never mutated
+        config = utils.apply_overrides(base_config, param_dict)
 
         # Generate unique model name
-        model_name = f"grid_{idx}_w{param_dict['window_length']}_n{param_dict['num_noise']}_f{param_dict['num_folds']}_s{param_dict['stride']}"
+        model_name = f"grid_{trial.number}_w{param_dict['window_length']}_n{param_dict['num_noise']}_f{param_dict['num_folds']}_s{param_dict['stride']}"
 
         # Compute model_dir before try block
         model_dir = (
@@ -79,19 +108,32 @@ def run_grid_search(base_config_path, output_dir="grid_search_results"):
             + "_".join(config["data_names"])
             + "/"
         )
+        trial.set_user_attr("model_name", model_name)
+        trial.set_user_attr("model_dir", model_dir)
 
         try:
-            # Run pipeline
-            pipeline(config, model_name=model_name, train_kf=True)
+            if executor is not None:
+                # Parallel mode: whichever pinned worker picks this up is a
+                # free GPU; the pool's queue does the device arbitration
+                executor.submit(
+                    _run_pipeline_on_gpu, config, model_name
+                ).result()
+            elif ctx is not None:
+                # Serial mode: run through the shared context (reuses the h5
+                # dataset across runs with the same dataset params); pipeline
+                # reports per-fold val acc to the trial so the pruner can stop
+                # unpromising parameter sets after 1-2 folds
+                ctx.run(param_dict, model_name, trial=trial)
+            else:
+                pipeline(config, model_name=model_name, train_kf=True, trial=trial)
 
             # Extract results from CSV
             results_csv = model_dir + "results.csv"
 
             if os.path.exists(results_csv):
-                df = pd.read_csv(results_csv)
-                mean_val_acc = df["Validation Acc"].mean()
-                mean_train_acc = df["Training Acc"].mean()
-                max_val_acc = df["Validation Acc"].max()
+                mean_val_acc, max_val_acc, mean_train_acc = utils.read_trial_metrics(
+                    results_csv
+                )
 
                 print(f"  Mean Val Acc: {mean_val_acc:.4f}")
                 print(f"  Max Val Acc: {max_val_acc:.4f}")
@@ -102,71 +144,144 @@ def run_grid_search(base_config_path, output_dir="grid_search_results"):
                 mean_train_acc = 0.0
                 max_val_acc = 0.0
 
-            # Store results
-            result_entry = param_dict.copy()
-            result_entry["mean_val_acc"] = mean_val_acc
-            result_entry["max_val_acc"] = max_val_acc
-            result_entry["mean_train_acc"] = mean_train_acc
-            result_entry["model_name"] = model_name
-            result_entry["model_dir"] = model_dir
-            results.append(result_entry)
-
+            trial.set_user_attr("max_val_acc", max_val_acc)
+            trial.set_user_attr("mean_train_acc", mean_train_acc)
+
+            if trial_cache is not None:
+                trial_cache[cache_key] = {
+                    "mean_val_acc": mean_val_acc,
+                    "max_val_acc": max_val_acc,
+                    "mean_train_acc": mean_train_acc,
+                    "model_name": model_name,
+                    "model_dir": model_dir,
+                }
+                utils.dump_json_atomic(cache_path, trial_cache)
+
+        except optuna.TrialPruned:
+            print(f"  → Pruned (below median after partial folds)")
+            raise
         except Exception as e:
             print(f"  ERROR: Training failed with exception: {e}")
-            result_entry = param_dict.copy()
-            result_entry["mean_val_acc"] = 0.0
-            result_entry["max_val_acc"] = 0.0
-            result_entry["mean_train_acc"] = 0.0
-            result_entry["model_name"] = model_name
-            result_entry["model_dir"] = model_dir
-            result_entry["error"] = str(e)
-            results.append(result_entry)
-
-        # Rolling cleanup: Keep only top K models as we go
-        if len(results) > TOP_K_MODELS:
-            results_sorted = sorted(
-                results, key=lambda x: x["mean_val_acc"], reverse=True
+            trial.set_user_attr("error", str(e))
+            mean_val_acc = 0.0
+        finally:
+            # Drop Python-side references between runs. Trials are serial, so
+            # the CUDA caching allocator reuses its blocks on the next pipeline
+            # call; empty_cache()/synchronize() here only add a full allocator
+            # scan + device stall per trial (and don't reliably free memory to
+            # other processes anyway). Opt back in via BCI_EMPTY_CACHE=1 if
+            # sharing the GPU across processes.
+            gc.collect()
+            if os.environ.get("BCI_EMPTY_CACHE") == "1" and torch.cuda.is_available():
+                torch.cuda.empty_cache()
+
+        return mean_val_acc
+
+    return objective
+
+
+def make_cleanup_callback():
+    """Rolling cleanup: keep only the top-K model dirs as trials complete.
+
+    A min-heap of (value, trial_number, model_dir) makes each eviction
+    O(log K) instead of rebuilding and re-sorting the whole trials dataframe
+    after every trial.
+    """
+    heap = []
+    lock = threading.Lock()  # callbacks run on each optimize worker thread
+
+    def cleanup_callback(study, trial):
+        model_dir = trial.user_attrs.get("model_dir", "")
+        if not model_dir or trial.user_attrs.get("cache_hit"):
+            return  # nothing trained, or dir belongs to an earlier trial
+        value = trial.value if trial.value is not None else 0.0
+        with lock:
+            heapq.heappush(heap, (value, trial.number, model_dir))
+            if len(heap) <= TOP_K_MODELS:
+                return
+            _, _, evicted = heapq.heappop(heap)
+        if os.path.exists(evicted):
+            print(f"  → Deleting: {os.path.basename(evicted.rstrip('/'))}")
+            _rm_pool.submit(shutil.rmtree, evicted, ignore_errors=True)
+
+    return cleanup_callback
+
+
+def run_grid_search(base_config_path, output_dir="grid_search_results"):
+    """
+    Run Optuna hyperparameter search.
+
+    Args:
+        base_config_path: Path to base YAML config file
+        output_dir: Directory to store results
+    """
+    # Load base config, frozen so no trial (or thread) can mutate shared state
+    base_config = types.MappingProxyType(utils.read_config(base_config_path))
+
+    # Create output directory
+    os.makedirs(output_dir, exist_ok=True)
+
+    print(f"Starting Optuna search with {N_TRIALS} trials...")
+    print(f"Parameters: {list(SEARCH_SPACE.keys())}")
+    print("=" * 80)
+
+    study = optuna.create_study(
+        direction="maximize",
+        sampler=optuna.samplers.TPESampler(),
+        pruner=optuna.pruners.MedianPruner(n_warmup_steps=1),
+    )
+
+    # On-disk memo of already-evaluated param tuples; also makes the sweep
+    # resumable after a crash
+    cache_path = os.path.join(output_dir, "trial_cache.json")
+    trial_cache = utils.load_json_cache(cache_path)
+    if trial_cache:
+        print(f"Loaded {len(trial_cache)} cached trial(s) from {cache_path}")
+
+    cleanup_cb = make_cleanup_callback()
+
+    n_gpus = torch.cuda.device_count()
+    if n_gpus > 1:
+        # One trial per GPU: trials are independent, so run them in pinned
+        # worker subprocesses and let Optuna drive one thread per device
+        print(f"Running {n_gpus} trials in parallel (one per GPU)")
+        spawn_ctx = multiprocessing.get_context("spawn")
+        gpu_ids = spawn_ctx.Queue()
+        for gpu_id in range(n_gpus):
+            gpu_ids.put(gpu_id)
+        with ProcessPoolExecutor(
+            max_workers=n_gpus, mp_context=spawn_ctx,
+            initializer=_pin_worker_gpu, initargs=(gpu_ids,),
+        ) as executor:
+            study.optimize(
+                make_objective(base_config, executor, trial_cache, cache_path),
+                n_trials=N_TRIALS,
+                n_jobs=n_gpus,
+                callbacks=[cleanup_cb],
+            )
+    else:
+        with PipelineContext(base_config) as ctx:
+            study.optimize(
+                make_objective(base_config, trial_cache=trial_cache,
+                               cache_path=cache_path, ctx=ctx),
+                n_trials=N_TRIALS,
+                callbacks=[cleanup_cb],
             )
-            kth_best_acc = results_sorted[TOP_K_MODELS - 1]["mean_val_acc"]
-            current_acc = results[-1]["mean_val_acc"]
 
-            if current_acc < kth_best_acc:
-                print(
-                    f"  → Deleting (below top {TOP_K_MODELS}: {current_acc:.4f} < {kth_best_acc:.4f})"
-                )
-                if os.path.exists(model_dir):
-                    shutil.rmtree(model_dir)
-            else:
-                models_to_keep = set(
-                    [r["model_dir"] for r in results_sorted[:TOP_K_MODELS]]
-                )
-                for result in results:
-                    result_dir = result.get("model_dir", "")
-                    if (
-                        result_dir
-                        and os.path.exists(result_dir)
-                        and result_dir not in models_to_keep
-                    ):
-                        print(f"  → Deleting: {os.path.basename(result_dir)}")
-                        shutil.rmtree(result_dir)
-
-        # Clean up memory after each run to prevent memory leak
-        gc.collect()
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
-            torch.cuda.synchronize()
+    # Wait for background deletions so disk state matches the results CSV
+    _rm_pool.shutdown(wait=True)
 
     # Save all results to CSV
-    results_df = pd.DataFrame(results)
+    results_df = study.trials_dataframe()
     results_csv_path = os.path.join(output_dir, "grid_search_results.csv")
     results_df.to_csv(results_csv_path, index=False)
 
     print("\n" + "=" * 80)
-    print("GRID SEARCH COMPLETE")
+    print("SEARCH COMPLETE")
     print("=" * 80)
 
     # Sort by mean validation accuracy
-    results_df_sorted = results_df.sort_values("mean_val_acc", ascending=False)
+    results_df_sorted = results_df.sort_values("value", ascending=False)
 
     # No cleanup needed - already done during training
     print(f"\nKept top {TOP_K_MODELS} models (cleaned up during training)")
@@ -176,18 +291,18 @@ def run_grid_search(base_config_path, output_dir="grid_search_results"):
     print(results_df_sorted.head(10).to_string(index=False))
 
     # Print best configuration
-    best_row = results_df_sorted.iloc[0]
+    best_trial = study.best_trial
     print("\n" + "=" * 80)
     print("BEST CONFIGURATION:")
     print("=" * 80)
-    print(f"  window_length: {int(best_row['window_length'])}")
-    print(f"  num_noise: {int(best_row['num_noise'])}")
-    print(f"  num_folds: {int(best_row['num_folds'])}")
-    print(f"  stride: {int(best_row['stride'])}")
-    print(f"  Mean Validation Accuracy: {best_row['mean_val_acc']:.4f}")
-    print(f"  Max Validation Accuracy: {best_row['max_val_acc']:.4f}")
-    print(f"  Mean Training Accuracy: {best_row['mean_train_acc']:.4f}")
-    print(f"  Model Name: {best_row['model_name']}")
+    print(f"  window_length: {best_trial.params['window_length']}")
+    print(f"  num_noise: {best_trial.params['num_noise']}")
+    print(f"  num_folds: {best_trial.params['num_folds']}")
+    print(f"  stride: {best_trial.params['stride']}")
+    print(f"  Mean Validation Accuracy: {best_trial.value:.4f}")
+    print(f"  Max Validation Accuracy: {best_trial.user_attrs.get('max_val_acc', 0.0):.4f}")
+    print(f"  Mean Training Accuracy: {best_trial.user_attrs.get('mean_train_acc', 0.0):.4f}")
+    print(f"  Model Name: {best_trial.user_attrs.get('model_name', '')}")
     print("=" * 80)
 
     return results_df
@@ -26,7 +26,12 @@ from flatten_dict import flatten
 import pickle
 from torch.utils.tensorboard import SummaryWriter
 
-def pipeline(config, model_name=None, data_name=None, verbosity=1, delete_data=False, train_kf=True):
+class PrunedTrial(Exception):
+    """Raised when a pruner callback decides a training run should stop early."""
+
+
+def pipeline(config, model_name=None, data_name=None, verbosity=1, delete_data=False, train_kf=True, trial=None, pruner=None,
+             h5_path=None, reuse_h5=False, keep_h5=False):
     os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
     writer = SummaryWriter(log_dir='runs/test-eegnet')
     
@@ -70,10 +75,14 @@ def pipeline(config, model_name=None, data_name=None, verbosity=1, delete_data=F
     # ============== h5 Dataset Creation ===============
     if data_name is None:
         data_name = model_name
-    h5_path = config['h5_dir'] + data_name + '.h5'
+    if h5_path is None:
+        h5_path = config['h5_dir'] + data_name + '.h5'
     print('h5_path', h5_path, 'model_name', model_name)
 
-    create_dataset(config, h5_path=h5_path)
+    if reuse_h5 and os.path.exists(h5_path):
+        print('reusing existing h5 dataset')
+    else:
+        create_dataset(config, h5_path=h5_path)
     
     # ==================== Training ====================
     config_train = config['training']
@@ -207,6 +216,19 @@ def pipeline(config, model_name=None, data_name=None, verbosity=1, delete_data=F
 
             del train_dataset
             del validation_dataset
+
+            # Report per-fold validation accuracy to Optuna so the pruner can
+            # kill unpromising trials after the first folds
+            if trial is not None:
+                import optuna
+                trial.report(train_stats['val_acc'][best_model_index], step=validation_fold)
+                if trial.should_prune():
+                    raise optuna.TrialPruned()
+
+            # Driver-supplied pruner callback (fold_idx, val_acc) -> bool for
+            # search drivers that don't go through Optuna
+            if pruner is not None and pruner(validation_fold, train_stats['val_acc'][best_model_index]):
+                raise PrunedTrial(f'pruned after fold {validation_fold}')
         # Save results
         if not os.path.exists('results'):
             os.makedirs('results/')
@@ -225,11 +247,18 @@ def pipeline(config, model_name=None, data_name=None, verbosity=1, delete_data=F
 
 
         results = pd.read_csv(model_dir + "/results.csv")
+    except PrunedTrial:
+        raise  # let the driver record the pruned run (h5 still removed below)
     except Exception as e:
+        if trial is not None:
+            import optuna
+            if isinstance(e, optuna.TrialPruned):
+                raise  # let Optuna record the pruned trial (h5 still removed below)
         print("[pipeline] Training failed with exception:", repr(e))
         traceback.print_exc()
     finally:
-        os.remove(h5_path)
+        if not keep_h5:
+            os.remove(h5_path)
     print('============================================================')
     print(f'The name of this model is: {model_name},')
     print(f'at model_dir {model_dir}')
@@ -237,6 +266,52 @@ def pipeline(config, model_name=None, data_name=None, verbosity=1, delete_data=F
     print('============================================================')
     return
 
+class PipelineContext:
+    '''Reuses expensive per-run setup across hyperparameter-search trials.
+
+    The generated h5 dataset only depends on the searched dataset parameters
+    (window_length, stride, num_noise, num_folds); when consecutive runs share
+    them, the windowing/augmentation pass is skipped and the previous file is
+    reused instead of being rebuilt and deleted per trial. Use as a context
+    manager (or call close()) so the last h5 is removed at the end of a sweep.
+    '''
+
+    DATASET_PARAMS = ('window_length', 'stride', 'num_noise', 'num_folds')
+
+    def __init__(self, base_config):
+        self.base_config = base_config
+        self._h5_key = None
+        self._h5_path = None
+
+    def run(self, overrides, model_name, train_kf=True, trial=None, pruner=None):
+        config = utils.apply_overrides(self.base_config, overrides)
+        key = tuple(overrides.get(name) for name in self.DATASET_PARAMS)
+        reuse = (key == self._h5_key and self._h5_path is not None
+                 and os.path.exists(self._h5_path))
+        if not reuse:
+            if self._h5_path is not None and os.path.exists(self._h5_path):
+                os.remove(self._h5_path)  # stale dataset from the previous key
+            self._h5_path = config['h5_dir'] + model_name + '.h5'
+            self._h5_key = key
+        # keep_h5 so the dataset survives for the next run with the same key;
+        # state is updated before the call so close() cleans up even if the
+        # run is pruned or fails
+        pipeline(config, model_name=model_name, train_kf=train_kf, trial=trial,
+                 pruner=pruner, h5_path=self._h5_path, reuse_h5=reuse, keep_h5=True)
+
+    def close(self):
+        if self._h5_path is not None and os.path.exists(self._h5_path):
+            os.remove(self._h5_path)
+        self._h5_path = None
+        self._h5_key = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
 if __name__ == '__main__':
     yaml_file = sys.argv[1]
     model_name = sys.argv[2] if len(sys.argv) >= 3 else None
@@ -7,12 +7,20 @@ Total: ~12 runs instead of 72
 
 import os
 import sys
+import json
+import types
+import numpy as np
 import pandas as pd
 import gc
 import torch
 from shared_utils import utils
-from pipeline_kf_func import pipeline
+from pipeline_kf_func import PipelineContext, PrunedTrial
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+# Model-dir deletions are I/O-bound and can take seconds to minutes on network
+# filesystems; run them off the training critical path
+_rm_pool = ThreadPoolExecutor(max_workers=2)
 
 # Define search ranges for each parameter
 PARAM_RANGES = {
@@ -27,26 +35,54 @@ BEST_PARAMS = {"window_length": 125, "num_noise": 4, "num_folds": 5, "stride": 1
 
 
 def cleanup_memory():
-    """Aggressively clean up memory between runs"""
+    """Drop Python-side references between runs.
+
+    Runs are serial, so the CUDA caching allocator reuses its blocks on the
+    next pipeline call; empty_cache()/synchronize() here only add a full
+    allocator scan + device stall per run (and don't reliably free memory to
+    other processes anyway). Opt back in via BCI_EMPTY_CACHE=1 if sharing the
+    GPU across processes.
+    """
     gc.collect()
-    if torch.cuda.is_available():
+    if os.environ.get("BCI_EMPTY_CACHE") == "1" and torch.cuda.is_available():
         torch.cuda.empty_cache()
-        torch.cuda.synchronize()
 
 
-def run_single_experiment(config, param_name, param_value, best_params, idx):
+def make_pruner(per_fold_history, fold_accs):
+    """Median pruner over folds: stop a run whose fold-k val acc is below the
+    median fold-k val acc of previously completed runs. fold_accs collects the
+    per-fold accuracies of the current run as a side effect."""
+
+    def should_prune(fold_idx, val_acc):
+        fold_accs.append(val_acc)
+        completed = [h[fold_idx] for h in per_fold_history if len(h) > fold_idx]
+        if len(completed) < 2:
+            return False  # not enough history to judge yet
+        return val_acc < np.median(completed)
+
+    return should_prune
+
+
+def run_single_experiment(ctx, param_name, param_value, best_params, idx, per_fold_history,
+                          trial_cache=None, cache_path=None):
     """Run a single training experiment"""
     # Update config with current best params + the one we're testing
     test_params = best_params.copy()
     test_params[param_name] = param_value
 
-    config["dataset_generator"]["window_length"] = test_params["window_length"]
-    config["augmentation"]["window_length"] = test_params["window_length"]
-    config["augmentation"]["num_noise"] = test_params["num_noise"]
-    config["augmentation"]["stride"] = test_params["stride"]
-    config["partition"]["num_folds"] = test_params["num_folds"]
-    config["training"]["num_folds"] = test_params["num_folds"]
-    config["model"]["window_length"] = test_params["window_length"]
+    # Trial cache: sequential search revisits the running-best combo when it
+    # starts each new parameter, so identical param tuples are memoized on disk
+    cache_key = json.dumps(sorted(test_params.items()))
+    if trial_cache is not None and cache_key in trial_cache:
+        cached = dict(trial_cache[cache_key])
+        print(f"\n→ Cache hit for {test_params}: val acc {cached['mean_val_acc']:.4f}")
+        cached["param_name"] = param_name
+        cached["param_value"] = param_value
+        return cached
+
+    # Build the run config by path-copying only the overridden sections;
+    # the base config itself is frozen and never mutated
+    config = utils.apply_overrides(ctx.base_config, test_params)
 
     # Generate model name
     model_name = f"seq_{idx}_{param_name}{param_value}_w{test_params['window_length']}_n{test_params['num_noise']}_f{test_params['num_folds']}_s{test_params['stride']}"
@@ -60,15 +96,19 @@ def run_single_experiment(config, param_name, param_value, best_params, idx):
     print(f"Model: {model_name}")
     print(f"{'=' * 80}\n")
 
+    fold_accs = []
     try:
-        # Run pipeline
-        pipeline(config, model_name=model_name, train_kf=True)
+        # Run through the shared context (reuses the h5 dataset across runs
+        # with the same dataset params) with a fold-level median pruner so
+        # obviously-bad parameter values stop after the first folds
+        ctx.run(test_params, model_name,
+                pruner=make_pruner(per_fold_history, fold_accs))
+        per_fold_history.append(fold_accs)
 
         # Extract results
         results_csv = model_dir + "results.csv"
         if os.path.exists(results_csv):
-            df = pd.read_csv(results_csv)
-            mean_val_acc = df["Validation Acc"].mean()
+            mean_val_acc, _, _ = utils.read_trial_metrics(results_csv)
             print(f"✓ Mean Validation Accuracy: {mean_val_acc:.4f}")
         else:
             print(f"✗ Results file not found!")
@@ -77,12 +117,32 @@ def run_single_experiment(config, param_name, param_value, best_params, idx):
         # Cleanup memory immediately after run
         cleanup_memory()
 
+        result = {
+            "param_name": param_name,
+            "param_value": param_value,
+            "mean_val_acc": mean_val_acc,
+            "model_name": model_name,
+            "model_dir": model_dir,
+            **test_params,
+        }
+        if trial_cache is not None:
+            trial_cache[cache_key] = result
+            utils.dump_json_atomic(cache_path, trial_cache)
+        return result
+
+    except PrunedTrial:
+        # Record the partial accuracy; pruned runs still compete on it
+        per_fold_history.append(fold_accs)
+        mean_val_acc = float(np.mean(fold_accs)) if fold_accs else 0.0
+        print(f"✂ Pruned after {len(fold_accs)} fold(s); partial val acc {mean_val_acc:.4f}")
+        cleanup_memory()
         return {
             "param_name": param_name,
             "param_value": param_value,
             "mean_val_acc": mean_val_acc,
             "model_name": model_name,
             "model_dir": model_dir,
+            "pruned": True,
             **test_params,
         }
 
@@ -105,8 +165,8 @@ def sequential_search(base_config_path, output_dir="sequential_search_results"):
     Run sequential hyperparameter search.
     Optimizes parameters one at a time in order: window_length → num_noise → num_folds → stride
     """
-    # Load base config
-    base_config = utils.read_config(base_config_path)
+    # Load base config, frozen so no run can mutate shared state
+    base_config = types.MappingProxyType(utils.read_config(base_config_path))
 
     # Create output directory
     os.makedirs(output_dir, exist_ok=True)
@@ -114,6 +174,14 @@ def sequential_search(base_config_path, output_dir="sequential_search_results"):
     all_results = []
     best_params = BEST_PARAMS.copy()
     run_idx = 0
+    per_fold_history = []  # per-run fold val accs, for the median pruner
+
+    # On-disk memo of already-evaluated param tuples; also makes the search
+    # resumable after a crash
+    cache_path = os.path.join(output_dir, "trial_cache.json")
+    trial_cache = utils.load_json_cache(cache_path)
+    if trial_cache:
+        print(f"Loaded {len(trial_cache)} cached trial(s) from {cache_path}")
 
     print("\n" + "=" * 80)
     print("SEQUENTIAL HYPERPARAMETER SEARCH")
@@ -121,6 +189,9 @@ def sequential_search(base_config_path, output_dir="sequential_search_results"):
     print(f"Starting with defaults: {best_params}")
     print(f"Search order: window_length → num_noise → num_folds → stride")
 
+    # Shared context so runs with identical dataset params reuse the h5
+    ctx = PipelineContext(base_config)
+
     # Optimize each parameter sequentially
     for param_name in ["window_length", "num_noise", "num_folds", "stride"]:
         print(f"\n\n{'#' * 80}")
@@ -133,7 +204,8 @@ def sequential_search(base_config_path, output_dir="sequential_search_results"):
         # Test each value for this parameter
         for param_value in PARAM_RANGES[param_name]:
             result = run_single_experiment(
-                base_config.copy(), param_name, param_value, best_params, run_idx
+                ctx, param_name, param_value, best_params, run_idx,
+                per_fold_history, trial_cache, cache_path
             )
             param_results.append(result)
             all_results.append(result)
@@ -156,7 +228,10 @@ def sequential_search(base_config_path, output_dir="sequential_search_results"):
             model_dir = result.get("model_dir", "")
             if model_dir and model_dir != best_model_dir and os.path.exists(model_dir):
                 print(f"  → Deleting: {os.path.basename(model_dir)}")
-                shutil.rmtree(model_dir)
+                _rm_pool.submit(shutil.rmtree, model_dir, ignore_errors=True)
+
+    # Remove the last cached h5 dataset
+    ctx.close()
 
     # Save all results
     results_df = pd.DataFrame(all_results)
@@ -178,7 +253,10 @@ def sequential_search(base_config_path, output_dir="sequential_search_results"):
         model_dir = result.get("model_dir", "")
         if os.path.exists(model_dir) and model_dir not in final_model_dirs:
             print(f"  Deleting: {model_dir}")
-            shutil.rmtree(model_dir)
+            _rm_pool.submit(shutil.rmtree, model_dir, ignore_errors=True)
+
+    # Wait for background deletions so disk state matches the results CSV
+    _rm_pool.shutdown(wait=True)
 
     print(
         f"\nCleanup complete. Kept {len(final_model_dirs)} best models (one per parameter)."
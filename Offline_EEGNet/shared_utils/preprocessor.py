@@ -1,6 +1,7 @@
 import numpy as np
 from scipy.signal import butter
 from scipy import signal
+from scipy import sparse
 import sys
 try:
     from . import utils
@@ -34,6 +35,8 @@ class DataPreprocessor:
         self.lowcut = config['bandpass_filter']['lowcut']
         self.highcut = config['bandpass_filter']['highcut']
         self.order = config['bandpass_filter']['order']
+        self.bandpass_sos = None    # designed lazily on first bandpass_channels call
+        self.laplacian_next = None  # built lazily on first laplacian_filtering call
         self.apply_laplacian = config.get('apply_laplacian', False)  # Default True for backward compatibility
         self.sf = config['sampling_frequency']
         # Normalize skip threshold: default to ~2 seconds worth of samples at input Fs
@@ -48,8 +51,19 @@ class DataPreprocessor:
         self.online_status = config['online_status']
         self.normalizer_type = config['normalizer_type']
         self.first_run = True
+        self._warm = False  # flips True on the first fully-filled online window
         self.zero_center = bool(config.get('zero_center', True)) # True if subtracting the mean of data. Only applies to offline and Welfords, NOT running_mean.
 
+        # Precompute which columns survive channel dropping so throw_channels
+        # is a single take instead of per-call name lookups + np.delete
+        if self.ch_to_drop:
+            ch_names, _ = self.get_electrode_position()
+            drop_set = set(self.ch_to_drop)
+            keep_cols = [i for i, ch in enumerate(ch_names) if ch not in drop_set]
+            self.keep_cols = np.array(keep_cols, dtype=np.intp) if len(keep_cols) < len(ch_names) else None
+        else:
+            self.keep_cols = None
+
     def get_electrode_position(self):
         '''Get electrode names and grid coordinates for different cap types.
 
@@ -112,18 +126,15 @@ class DataPreprocessor:
         data: 2-d array with shape (n_samples, n_electrodes)
         '''
 
-        def butter_bandpass_filter(data, lowcut, highcut, sf, order):
-            nyq = 0.5 * sf
-            low = lowcut / nyq
-            high = highcut / nyq
-            b, a = butter(order, [low, high], btype='band')
-            y = signal.filtfilt(b, a, data)
-            return y
-
-        for electrode_ix in range(data.shape[1]):
-            data[:, electrode_ix] = butter_bandpass_filter(data[:,electrode_ix], self.lowcut, self.highcut, self.sf, self.order)
+        # Design the filter once; second-order sections stay numerically stable
+        # at higher orders where transfer-function (b, a) coefficients degrade.
+        if self.bandpass_sos is None:
+            nyq = 0.5 * self.sf
+            self.bandpass_sos = butter(self.order, [self.lowcut / nyq, self.highcut / nyq],
+                                       btype='band', output='sos').astype(np.float32)
 
-        return data
+        # Filter every channel in one vectorized call along the sample axis
+        return signal.sosfiltfilt(self.bandpass_sos, data, axis=0)
 
     def laplacian_filtering(self, data):
         '''Apply laplacian filter to data with neighbor distance as 2 (next next one).
@@ -137,6 +148,13 @@ class DataPreprocessor:
         data: 2-d array with shape (n_samples, n_electrodes)
         '''
 
+        # The matrix only depends on cap type and dropped channels, both fixed
+        # at construction, so build it once and reuse it on every call
+        if self.laplacian_next is not None:
+            if sparse.issparse(self.laplacian_next):
+                return self.laplacian_next.dot(data.T).T
+            return data @ self.laplacian_next.T
+
         # Get labels and coordinates of all channels for cap type
         ch_names, coords = self.get_electrode_position()
         GRIDSHAPE = (max([coord[1] for coord in coords])+1, max([coord[0] for coord in coords])+1)
@@ -164,16 +182,25 @@ class DataPreprocessor:
                 neighbors_i.append(int(inds_grid[ix, iy+2]))
             neighbors.append(neighbors_i)
 
-        # Create row for each electrode indicating all neighbors
-        next_adjacency = np.zeros((len(ch_names), len(ch_names)))
-        for i, neighbors_i in enumerate(neighbors):
-            next_adjacency[i, neighbors_i] = 1
+        # Build I - normalized adjacency directly from the neighbor lists.
+        # Each electrode has at most 4 neighbors, so the matrix is ~4/D sparse;
+        # store CSR for larger caps (O(nnz) apply), dense for small ones where
+        # BLAS wins anyway.
         D = len(ch_names)
-
-        laplacian_next = np.eye(D) - (next_adjacency / np.maximum(np.sum(next_adjacency, axis=1), 1)).T
+        rows, cols, vals = [], [], []
+        for i, neighbors_i in enumerate(neighbors):
+            for j in neighbors_i:
+                # matches the original (adjacency / degree).T construction,
+                # whose broadcasting normalized by the neighbor's degree
+                rows.append(j)
+                cols.append(i)
+                vals.append(-1.0 / max(len(neighbors[j]), 1))
+        laplacian = (sparse.eye(D) +
+                     sparse.csr_matrix((vals, (rows, cols)), shape=(D, D))).tocsr().astype(np.float32)
+        self.laplacian_next = laplacian if D >= 32 else laplacian.toarray()
         #print("Laplacian applied.")
 
-        return data @ laplacian_next.T
+        return self.laplacian_filtering(data)
 
     def normalize_channels(self, data, zero_center=False, skip_samples=2000):
         '''Normalize each channel to have mean 0 and standard deviation 1.
@@ -223,15 +250,10 @@ class DataPreprocessor:
             Data from eeg_data['databuffer'].
         '''
 
-        # If no channels to drop are specified, skip name lookups
-        if not self.ch_to_drop:
-            return data
-        ch_names, _ = self.get_electrode_position()
-        ch_index_to_drop = [ch_names.index(ch) for ch in self.ch_to_drop if ch in ch_names]
-        if len(ch_index_to_drop) == 0:
+        # keep_cols is precomputed in __init__ (None when nothing to drop)
+        if self.keep_cols is None:
             return data
-        data = np.delete(data, ch_index_to_drop, axis=1)
-        return data
+        return data[:, self.keep_cols]
 
     def preprocess(self, data):
         '''Manage the whole preprocessing procedure.
@@ -246,6 +268,11 @@ class DataPreprocessor:
         data: 2-d array with shape (n_samples, n_electrodes)
         '''
 
+        # The whole pipeline runs in float32: EEG is effectively <=24-bit and
+        # the model trains in float32, so float64 only doubles memory traffic
+        # through the filter/matmul stages
+        data = np.ascontiguousarray(data, dtype=np.float32)
+
         # Throw out channels
         data = self.throw_channels(data)
 
@@ -262,9 +289,13 @@ class DataPreprocessor:
             data = self.normalize_channels(data, zero_center=self.zero_center, skip_samples=self.skip_samples_eff)
         #If online, normalize with data collected up to this point in time
         if self.online_status == 'online':
-            #Check if data buffer not yet filled. If not, return data unaltered
-            if self.test_if_buffer_not_filled(data):
-                return data
+            #Check if data buffer not yet filled. If not, return data unaltered.
+            #Only relevant at stream startup: once one filled window has been
+            #seen, skip the full-window scan entirely.
+            if not self._warm:
+                if self.test_if_buffer_not_filled(data):
+                    return data
+                self._warm = True
 
             #Instantiate normalization object if needed
             if self.first_run:
@@ -298,28 +329,35 @@ class Welfords:
 
     def __init__(self, iterable, ddof=1, update_mean=False):
         self.size = iterable.shape[1]
-        self.ddof = np.full([self.size,], ddof)
+        self.ddof = np.full([self.size,], ddof, dtype=np.float32)
         self.n = 0
-        self.mean = np.zeros([self.size,])
-        self.M2 = np.zeros([self.size,])
+        self.mean = np.zeros([self.size,], dtype=np.float32)
+        # M2 accumulates squared deviations over a whole session; keep it in
+        # float64 so precision doesn't degrade as n grows
+        self.M2 = np.zeros([self.size,], dtype=np.float64)
         self.update_mean = update_mean
         self.include(iterable)
 
     def include(self, datum):
         if datum.ndim == 1:
-            self.n += 1
-            self.delta = datum - self.mean
-            if self.update_mean:
-                self.mean += self.delta / self.n
-            self.M2 += self.delta * (datum - self.mean)
-
-        if datum.ndim == 2:
-            for i in range(datum.shape[0]):
-                self.n += 1
-                self.delta = datum[i, :] - self.mean
-                if self.update_mean:
-                    self.mean += self.delta / self.n
-                self.M2 += self.delta * (datum[i, :] - self.mean)
+            datum = datum[None, :]
+        n_batch = datum.shape[0]
+
+        if not self.update_mean:
+            # Mean is held fixed, so M2 is just a sum of squared deviations
+            self.M2 += np.sum((datum - self.mean)**2, axis=0)
+            self.n += n_batch
+            return
+
+        # Chan et al. parallel update: merge the batch's mean/M2 into ours in
+        # one vectorized step instead of looping over samples in Python
+        batch_mean = np.mean(datum, axis=0)
+        batch_M2 = np.sum((datum - batch_mean)**2, axis=0)
+        delta = batch_mean - self.mean
+        n_total = self.n + n_batch
+        self.mean += delta * (n_batch / n_total)
+        self.M2 += batch_M2 + delta**2 * (self.n * n_batch / n_total)
+        self.n = n_total
 
     @property
     def variance(self):
@@ -327,7 +365,8 @@ class Welfords:
 
     @property
     def std(self):
-        return np.sqrt(self.variance)
+        # cast back so normalized data stays float32
+        return np.sqrt(self.variance).astype(np.float32)
 
 
 class Running_Mean:
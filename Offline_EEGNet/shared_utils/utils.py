@@ -1,3 +1,4 @@
+import os
 import sys
 import numpy as np
 from scipy import signal
@@ -111,6 +112,113 @@ def read_config(yaml_name):
     return config
 
 
+# Nested config locations touched by each searchable hyperparameter
+SEARCH_PARAM_PATHS = {
+    'window_length': (('dataset_generator', 'window_length'),
+                      ('augmentation', 'window_length'),
+                      ('model', 'window_length')),
+    'num_noise': (('augmentation', 'num_noise'),),
+    'stride': (('augmentation', 'stride'),),
+    'num_folds': (('partition', 'num_folds'),
+                  ('training', 'num_folds')),
+}
+
+
+def apply_overrides(base, overrides):
+    '''Build a trial config from an immutable base plus hyperparameter overrides.
+
+    Path-copies only the nested sections that an override touches (persistent
+    data structure style), so the base config is never mutated and untouched
+    sections are shared instead of deep-copied per trial.
+
+    Parameters
+    ----------
+    base: mapping
+        Base config (may be a read-only MappingProxyType).
+    overrides: dict
+        Searchable hyperparameter name -> value; see SEARCH_PARAM_PATHS.
+
+    Returns
+    -------
+    config: dict
+        A plain dict safe to hand to pipeline().
+    '''
+
+    config = dict(base)
+    copied = set()
+    for name, value in overrides.items():
+        for path in SEARCH_PARAM_PATHS[name]:
+            node = config
+            for depth, key in enumerate(path[:-1]):
+                if (path[:depth + 1]) not in copied:
+                    node[key] = dict(node[key])
+                    copied.add(path[:depth + 1])
+                node = node[key]
+            node[path[-1]] = value
+    return config
+
+
+def load_json_cache(path):
+    '''Load a json cache file, returning an empty dict if absent or corrupt.'''
+
+    import json
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def dump_json_atomic(path, obj):
+    '''Write obj as json via a temp file + rename so a crash mid-write never
+    leaves a truncated cache behind.'''
+
+    import json
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(obj, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_trial_metrics(results_csv):
+    '''Stream a per-model results.csv and accumulate its summary metrics.
+
+    Single pass with csv.reader, avoiding a full pandas parse (with dtype
+    inference) on the sweep's per-trial critical path.
+
+    Parameters
+    ----------
+    results_csv: str
+        Path to a results.csv with "Training Acc" and "Validation Acc" columns.
+
+    Returns
+    -------
+    (mean_val_acc, max_val_acc, mean_train_acc): tuple of float
+        All zeros if the file has no data rows.
+    '''
+
+    import csv
+    sum_val = sum_train = 0.0
+    max_val = 0.0
+    count = 0
+    with open(results_csv, newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        val_col = header.index('Validation Acc')
+        train_col = header.index('Training Acc')
+        for row in reader:
+            if not row:
+                continue
+            val = float(row[val_col])
+            sum_val += val
+            max_val = max(max_val, val)
+            sum_train += float(row[train_col])
+            count += 1
+    if count == 0:
+        return 0.0, 0.0, 0.0
+    return sum_val / count, max_val, sum_train / count
+
+
 
 def read_data_file_to_dict(filename, return_dict=True):
     '''Read in the information in .bin file into a dict.
@@ -193,6 +301,60 @@ def read_data_file_to_dict(filename, return_dict=True):
     return data_dict
 
 
+def read_data_file_mmap(filename):
+    '''Read a .bin data file through mmap, returning field views into the file.
+
+    Same header/record layout as read_data_file_to_dict, but instead of
+    slurping the whole file with read(), the record block is memory-mapped and
+    each field is a zero-copy view: the OS demand-pages only the columns a
+    caller actually touches, so loading a multi-GB session costs O(bytes
+    touched) rather than O(file size), and peak RSS stays at the working set.
+
+    Parameters
+    ----------
+    filename: str
+        Path to .bin file.
+
+    Returns
+    -------
+    data_dict: dict
+        Same keys as read_data_file_to_dict (field arrays plus 'name' and
+        'dtypes'), with an extra '_mmap' entry holding the mmap object so the
+        mapped pages stay valid for the life of the dict. The field arrays are
+        read-only views; np.copy() any field that needs mutating.
+    '''
+
+    import mmap
+    with open(filename, 'rb') as openfile:
+        name = openfile.readline().decode('utf-8').strip()
+        keys = openfile.readline().decode('utf-8').strip()
+        dtypes = openfile.readline().decode('utf-8').strip()
+        shapes = None
+
+        if len(dtypes.split('$')) == 2:             # shapes can be indicated with a $ to separate.
+            dtypes, shapes = dtypes.split('$')
+            dtypes = dtypes.strip()
+            shapes = ast.literal_eval(shapes.strip())
+
+        keys = keys.split(',')
+        dtypes = dtypes.split(',')
+        offset = openfile.tell()
+        mm = mmap.mmap(openfile.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if shapes is None:
+        rec_dt = np.dtype([item for item in zip(keys, dtypes)])
+    else:
+        rec_dt = np.dtype([item for item in zip(keys, dtypes, shapes)])
+    n_records = (len(mm) - offset) // rec_dt.itemsize
+    data = np.frombuffer(mm, dtype=rec_dt, count=n_records, offset=offset)
+
+    data_dict = {key: data[key] for key in keys}
+    data_dict['name'] = name
+    data_dict['dtypes'] = dtypes
+    data_dict['_mmap'] = mm                         # keeps the mapping alive
+    return data_dict
+
+
 if __name__ == "__main__":
 
     # put in yaml file name as input (i.e config.yaml)
@@ -61,17 +61,17 @@ def diagnose_timing():
 
         time.sleep(0.1)  # Let data accumulate
 
-        # Test get_board_data()
-        start_time = time.time()
+        # Test get_board_data() (monotonic int-ns clock for deltas)
+        start_time = time.perf_counter_ns()
         data_all = board.get_board_data()
-        time1 = time.time() - start_time
+        time1 = (time.perf_counter_ns() - start_time) / 1e9
 
         time.sleep(0.05)  # Let more data accumulate
 
         # Test get_current_board_data()
-        start_time = time.time()
+        start_time = time.perf_counter_ns()
         data_current = board.get_current_board_data(50)
-        time2 = time.time() - start_time
+        time2 = (time.perf_counter_ns() - start_time) / 1e9
 
         print(f"  📊 get_board_data(): {data_all.shape[1]} samples in {time1*1000:.1f}ms")
         if data_all.shape[1] > 0:
@@ -88,22 +88,22 @@ def diagnose_timing():
         print("Testing if our processing is too slow...")
 
         for cycle in range(3):
-            cycle_start = time.time()
+            cycle_start = time.perf_counter_ns()
 
             # Get data
             data_2d = board.get_board_data()
-            data_time = time.time() - cycle_start
+            data_time = (time.perf_counter_ns() - cycle_start) / 1e9
 
             # Simulate processing time
-            processing_start = time.time()
+            processing_start = time.perf_counter_ns()
             if data_2d.shape[1] > 0:
                 # Simulate EEG processing (array operations)
                 eeg_data = data_2d[1:17, :].T  # Extract EEG channels
                 filtered_data = np.mean(eeg_data, axis=1)  # Simulate filtering
                 result = np.sum(filtered_data)  # Simulate computation
-            processing_time = time.time() - processing_start
+            processing_time = (time.perf_counter_ns() - processing_start) / 1e9
 
-            total_time = time.time() - cycle_start
+            total_time = (time.perf_counter_ns() - cycle_start) / 1e9
 
             if data_2d.shape[1] > 0:
                 sample_numbers = data_2d[package_num_channel, :]
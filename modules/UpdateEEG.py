@@ -2,12 +2,26 @@
 
 # Get new data from BrainFlow (replaces TCP receiving)
 try:
-    # Get all available data and remove from BrainFlow buffer
-    data_2d = board.get_board_data()
+    # Check the count first so empty ticks cost one DLL call and no allocation;
+    # nonempty reads land in the persistent scratch buffer
+    n_avail = get_board_data_count()    # bound method resolved in constructor
 
-    if data_2d.shape[1] > 0:
-        # BrainFlow returns [channels × samples], we need [samples × channels]
-        eeg_data = data_2d[eeg_channels, :].T  # (n_samples, 16)
+    # Let sub-batch dribbles accumulate in the board ring until either
+    # min_batch samples are waiting or the latency deadline passes
+    if 0 < n_avail < min_batch:
+        now_ns = time.perf_counter_ns()  # monotonic int math, no float epoch time
+        if batch_deadline == 0:
+            batch_deadline = now_ns + max_batch_latency_ns
+        if now_ns < batch_deadline:
+            n_avail = 0
+
+    if n_avail > 0:
+        batch_deadline = 0
+        data_2d = read_board_data(n_avail)
+        # BrainFlow returns [channels × samples]; eeg_rows is a slice, so this
+        # is a stride-only view — the transpose happens once, directly in the
+        # batch store below
+        eeg_data = data_2d[eeg_rows].T  # (n_samples, 16) view
         nSamples = eeg_data.shape[0]
 
         # Cache values used to compute synthetic continuous counter
@@ -15,8 +29,7 @@ try:
 
         # For real package counter, get raw values as int64 for unwrapping; else, use None
         raw_pkg = None
-        # Only use HW package counter if available AND enabled via params
-        if ('has_pkg_channel' in globals() and has_pkg_channel) and ('use_pkg_counter' in globals() and use_pkg_counter):
+        if pkg_enabled:                 # availability + params resolved in constructor
             try:
                 raw_pkg = data_2d[package_num_channel, :].astype(np.int64)
             except Exception:
@@ -26,39 +39,77 @@ try:
         # Note: We still write samples but mark nSamples=0 if skipping is active
         skipping = (base_total + nSamples) < samplesToSkip
 
-        for idx in range(nSamples):
-            # Compute continuous counter value per sample
-            if raw_pkg is None:
-                cont = base_total + idx
+        # Compute continuous counter column for the whole batch at once
+        if raw_pkg is None:
+            if nSamples <= arange_scratch.shape[0]:
+                counter_col = base_total + arange_scratch[:nSamples]
             else:
-                pkg = int(raw_pkg[idx])
-                # unwrap across modulus
-                if 'last_pkg' in globals() and last_pkg is not None:
-                    if pkg < last_pkg and (last_pkg - pkg) > (pkg_modulus // 2):
-                        # wrap detected
-                        pkg_epoch += pkg_modulus
-                last_pkg = pkg
-                cont = pkg_epoch + pkg
+                counter_col = base_total + np.arange(nSamples, dtype=np.int64)
+        else:
+            # Vectorized unwrap across modulus: a wrap shows up as a large
+            # negative step between consecutive raw values (same test the old
+            # per-sample loop applied, including within a batch)
+            prev = raw_pkg[0] if last_pkg is None else last_pkg
+            deltas = np.diff(raw_pkg, prepend=prev)
+            epochs = pkg_epoch + np.cumsum(deltas < -(pkg_modulus // 2), dtype=np.int64) * pkg_modulus
+            counter_col = epochs + raw_pkg
+            pkg_epoch = int(epochs[-1])
+            last_pkg = int(raw_pkg[-1])
 
-            # Compose row and write to bipartite buffer
-            # Use buffer dtype for consistency
-            row = np.empty((nChannels,), dtype=eegbuffersignal.dtype)
-            row[:16] = eeg_data[idx]
-            row[16] = cont
-            eegbuffersignal[bufferInd] = row
-            eegbuffersignal[bufferInd - bufferoffset] = row
-            bufferInd = (bufferInd - bufferoffset + 1) % bufferoffset + bufferoffset
+        # Compose the whole batch and write it into both halves of the
+        # bipartite buffer in two block stores (no per-sample Python loop);
+        # the compose block is preallocated scratch for common batch sizes
+        if nSamples <= rows_scratch.shape[0]:
+            rows = rows_scratch[:nSamples]
+        else:
+            rows = np.empty((nSamples, nChannels), dtype=eegbuffersignal.dtype)
+        rows[:, :16] = eeg_data
+        rows[:, 16] = counter_col
+        # Contiguous slice stores into both halves (no index gather). The
+        # mirror write stays: consumers in other processes slice contiguous
+        # windows across the wrap straight out of shared memory, which only
+        # works if every row exists in both halves.
+        pos = bufferInd - bufferoffset
+        if nSamples < bufferoffset:
+            n1 = min(nSamples, bufferoffset - pos)
+            eegbuffersignal[bufferInd:bufferInd + n1] = rows[:n1]
+            eegbuffersignal[pos:pos + n1] = rows[:n1]
+            if n1 < nSamples:
+                eegbuffersignal[bufferoffset:bufferoffset + nSamples - n1] = rows[n1:]
+                eegbuffersignal[:nSamples - n1] = rows[n1:]
+        else:
+            # Pathological burst longer than the ring: last writer wins
+            idxs = (np.arange(nSamples) + pos) % bufferoffset + bufferoffset
+            eegbuffersignal[idxs] = rows
+            eegbuffersignal[idxs - bufferoffset] = rows
+        # Advance with a compare+subtract instead of %: after the slice path
+        # pos + nSamples wraps at most once, and the burst path has already
+        # reduced nSamples' contribution modulo the ring
+        pos += nSamples
+        if pos >= bufferoffset:
+            pos -= bufferoffset
+            if pos >= bufferoffset:     # only bursts longer than the ring
+                pos %= bufferoffset
+        bufferInd = pos + bufferoffset
 
-            # Continuity check on continuous counter (allow configurable step)
-            expected_step = 1
-            if raw_pkg is not None and 'pkg_expected_step' in globals():
-                try:
-                    expected_step = int(pkg_expected_step)
-                except Exception:
-                    expected_step = 1
-            if prevCount > 0 and (cont != prevCount + expected_step):
-                print(f"!!!!!!!!! Missing data between samples {prevCount} and {cont}")
-            prevCount = cont
+        # Continuity check on continuous counter (allow configurable step)
+        expected_step = pkg_expected_step if raw_pkg is not None else 1
+        checked = np.diff(counter_col, prepend=prevCount)
+        bad = np.flatnonzero(checked != expected_step)
+        if prevCount <= 0 and bad.size and bad[0] == 0:
+            bad = bad[1:]  # no previous sample yet; first boundary is not a gap
+        if bad.size:
+            # Stage gap pairs in the deferred log ring; no I/O on the hot path
+            gaps = np.empty((bad.size, 2), dtype=np.int64)
+            gaps[:, 0] = np.where(bad > 0, counter_col[bad - 1], prevCount)
+            gaps[:, 1] = counter_col[bad]
+            cap = missing_log.shape[0]
+            start = missing_log_count % cap
+            first = min(bad.size, cap - start)
+            missing_log[start:start + first] = gaps[:first]
+            missing_log[:bad.size - first] = gaps[first:]
+            missing_log_count += bad.size
+        prevCount = int(counter_col[-1])
 
         totalSamples += nSamples
         if skipping:
@@ -70,10 +121,23 @@ except Exception as e:
     print(f"BrainFlow error: {e}")
     nSamples = 0
 
+# Flush staged gap reports at most once a second (threads aren't allowed in
+# module loops, so the flush is amortized here instead of a logger thread)
+if missing_log_count > missing_log_flushed and time.perf_counter_ns() - missing_log_last_flush >= 1_000_000_000:
+    cap = missing_log.shape[0]
+    pending = missing_log_count - missing_log_flushed
+    if pending > cap:
+        print(f"!!!!!!!!! {pending - cap} gap reports dropped (log ring overflow)")
+        missing_log_flushed = missing_log_count - cap
+    for k in range(missing_log_flushed, missing_log_count):
+        prev_c, cont_c = missing_log[k % cap]
+        print(f"!!!!!!!!! Missing data between samples {prev_c} and {cont_c}")
+    missing_log_flushed = missing_log_count
+    missing_log_last_flush = time.perf_counter_ns()
+
 numEEGSamples[:] = nSamples
 eegbufferindex[:] = bufferInd
 # totalValidEEGSamples counts valid samples after any initial skip
 totalValidEEGSamples += nSamples
 
-t0 = time.time()
 tickNo += 1
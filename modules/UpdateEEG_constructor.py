@@ -1,6 +1,7 @@
 import numpy as np
 import time
-from brainflow.board_shim import BoardShim, BrainFlowInputParams, BoardIds
+from brainflow.board_shim import BoardShim, BrainFlowInputParams, BoardIds, BrainFlowPresets
+from brainflow.board_shim import BoardControllerDLL, BrainFlowError, BrainFlowExitCodes
 
 print('#'*50)
 print('INITIALIZING EEG via BrainFlow...')
@@ -9,6 +10,11 @@ print('INITIALIZING EEG via BrainFlow...')
 nChannels = 17
 
 # Buffer management (keep existing logic)
+# The ring's dtype comes from the model YAML signal declaration (float32).
+# That already halves bandwidth versus BrainFlow's float64 output; an int32
+# quantized ring would be the same 4 bytes per sample but break the float32
+# eeg.bin record format and the float filtering in filterEEG, so the single
+# downcast happens once, in the batch store below.
 bufferoffset = eegbuffersignal.shape[0] // 2
 bufferInd = bufferoffset
 eegbufferindex[:] = bufferInd
@@ -69,11 +75,23 @@ for cmd in user_cmds:
     except Exception as e:
         print(f"Warning: failed to apply board command '{cmd}': {e}")
 
-board.start_stream()
-
-# Get sampling rate and channel info from physical id
+# BrainFlow's native streaming thread is the producer half of the acquisition
+# pipeline: it pushes samples into an internal ring buffer while our tick only
+# drains it, so board jitter never stalls the module loop (modules must not
+# spawn their own threads). Size the ring to ride out multi-second stalls.
 sampling_rate = BoardShim.get_sampling_rate(phys_id)
+ring_seconds = float(params.get('brainflow_ring_seconds', 30.0))
+board.start_stream(max(1, int(sampling_rate * ring_seconds)))
+
+# Get channel info from physical id
 eeg_channels = BoardShim.get_eeg_channels(phys_id)
+# EEG rows are contiguous on every board we use (1..16 on Cyton Daisy), so
+# index with a slice: slicing the board matrix is a view, while a fancy index
+# with the channel list copies all 16 rows before the transpose into the ring
+if eeg_channels == list(range(eeg_channels[0], eeg_channels[0] + len(eeg_channels))):
+    eeg_rows = slice(eeg_channels[0], eeg_channels[0] + len(eeg_channels))
+else:
+    eeg_rows = np.asarray(eeg_channels)
 package_num_channel = BoardShim.get_package_num_channel(phys_id)
 has_pkg_channel = isinstance(package_num_channel, int) and package_num_channel >= 0
 
@@ -85,11 +103,64 @@ has_pkg_channel = isinstance(package_num_channel, int) and package_num_channel >
 pkg_modulus = int(params.get('pkg_modulus', 256))
 pkg_expected_step = int(params.get('pkg_expected_step', 1))
 use_pkg_counter = bool(params.get('use_pkg_counter', True))
+pkg_enabled = bool(has_pkg_channel and use_pkg_counter)  # resolved once; no globals() probing per tick
 pkg_epoch = 0
 last_pkg = None
 
+# Persistent scratch for board reads: the Python get_board_data() allocates a
+# fresh float64 array every tick, so call the board controller DLL directly
+# into this buffer instead. Sized for ~200 ms of samples (ticks are 50 ms);
+# larger bursts fall back to the allocating call.
+bf_num_rows = BoardShim.get_num_rows(phys_id)
+bf_scratch_samples = max(1, int(sampling_rate * 0.2))
+bf_scratch = np.zeros(bf_num_rows * bf_scratch_samples, dtype=np.float64)
+bf_dll = BoardControllerDLL.get_instance()
+
+# Bindings resolved once instead of attribute-chasing through BoardShim /
+# the ctypes DLL wrapper on every tick
+get_board_data_count = board.get_board_data_count
+_dll_get_board_data = bf_dll.get_board_data
+_board_id = board.board_id
+_input_json = board.input_json
+
+
+def read_board_data(n_avail):
+    '''Pull n_avail packages from the BrainFlow ring buffer without
+    allocating, returning a (num_rows, n_avail) view into bf_scratch.'''
+    if n_avail > bf_scratch_samples:
+        return board.get_board_data(n_avail)
+    flat = bf_scratch[:bf_num_rows * n_avail]
+    res = _dll_get_board_data(n_avail, BrainFlowPresets.DEFAULT_PRESET, flat,
+                              _board_id, _input_json)
+    if res != BrainFlowExitCodes.STATUS_OK.value:
+        raise BrainFlowError('unable to get board data', res)
+    return flat.reshape(bf_num_rows, n_avail)
+
+
+# Common-case specialization: batches are tiny (a handful of samples per
+# 50 ms at 125 Hz), so per-tick np.empty/np.arange calls cost as much as the
+# copies themselves. Reuse one row-compose block and one index ramp, sliced
+# to the batch size; batches beyond scratch capacity allocate as before.
+rows_scratch = np.empty((bf_scratch_samples, nChannels), dtype=eegbuffersignal.dtype)
+arange_scratch = np.arange(bf_scratch_samples, dtype=np.int64)
+
+# Deferred continuity logging: gap events are staged in this ring on the hot
+# path (slice writes only) and flushed to stdout at most once a second, so a
+# burst of missing samples can't blow the tick budget on print formatting
+missing_log = np.empty((1024, 2), dtype=np.int64)
+missing_log_count = 0    # total gaps ever staged; ring slot = count % capacity
+missing_log_flushed = 0
+missing_log_last_flush = time.perf_counter_ns()
+
+# Batch ingest: skip the pull when fewer than min_batch samples are waiting,
+# unless they have been waiting longer than max_batch_latency seconds. At
+# ~125 Hz only a handful of samples accrue per 50 ms tick, so this spares the
+# C-API round trip and buffer writes on ticks that would move 1-2 samples.
+min_batch = int(params.get('min_batch_samples', 4))
+max_batch_latency_ns = int(float(params.get('max_batch_latency', 0.04)) * 1e9)
+batch_deadline = 0  # perf_counter_ns deadline; 0 = no batch pending
+
 totalValidEEGSamples[:] = 0
-t0 = time.time()
 tickNo = 0
 
 print(f"BrainFlow mode={mode}, sampling_rate={sampling_rate} Hz, EEG chans={len(eeg_channels)}, package_ch={package_num_channel}")
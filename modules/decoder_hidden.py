@@ -1,25 +1,23 @@
 
 # get data from buffer
 idx = eegbufferindex[0]
-window = np.copy(databuffer[idx - input_length:idx])
-
-# Remove non-EEG columns (e.g., sample counter) before preprocessing/resampling
-# Assumes the counter is stored in the last column as written by UpdateEEG/filterEEG
-if window.shape[1] > 0:
-    data = window[:, :-1]
-else:
-    data = window
+# Drop the counter column (last, as written by UpdateEEG/filterEEG) in the
+# same contiguous float32 copy that snapshots the window out of the shared
+# ring; preprocess's own ascontiguousarray then has nothing left to do
+data = np.ascontiguousarray(databuffer[idx - input_length:idx, :-1])
 
 # preprocess data
 data = dataPreprocessor.preprocess(data)
 
-# downsample
-data = resample(data, downsampled_length, axis=0)
+# downsample (polyphase or FFT, chosen in the constructor)
+data = downsample_window(data)
 
 # predict using model
 with torch.no_grad():
-    data = torch.FloatTensor(data).to(device)
-    probs, logits, hidden_state = model(data, return_logits=False, return_dataclass=True) # misnomer. returns (softmax_probs, logits, hidden_state)
+    data = data.astype(np.float32, copy=False)
+    if decoder_infer is None:
+        decoder_infer = make_decoder_infer(data)  # captures the CUDA graph on first tick
+    probs, logits, hidden_state = decoder_infer(data) # misnomer. returns (softmax_probs, logits, hidden_state)
     probs, logits, hidden_state = probs.flatten(), logits.flatten(), hidden_state.flatten()
     # Warning: this stores logits, not softmax probabilities!
     decoder_output.fill(0)
@@ -10,7 +10,8 @@ except ImportError:
     from modules.submodules.shared_utils.preprocessor import DataPreprocessor
     from modules.submodules.shared_utils.utils import read_config
 from modules.SJutil.DataStructure import deepDictUpdate
-from scipy.signal import resample
+from fractions import Fraction
+from scipy.signal import resample, resample_poly
 import numpy as np
 import torch
 from torch import nn
@@ -35,6 +36,19 @@ instantiate = SourceFileLoader("instantiate",str(decoder_path / "instantiate.py"
 model = instantiate.instantiate(params)
 model = model.to(device)
 
+# Inference precision: tiny-batch inference is bound by weight bandwidth, so
+# halve it with fp16 on CUDA or dynamically quantize the big matmuls to int8
+# on CPU. params.inference_precision: 'float32' keeps full precision.
+precision = str(params.get('inference_precision', 'auto'))
+if precision == 'auto':
+    precision = 'float16' if device.type == 'cuda' else 'int8'
+if precision == 'float16' and device.type == 'cuda':
+    model = model.half()
+elif precision == 'int8' and device.type == 'cpu':
+    model = torch.quantization.quantize_dynamic(
+        model, {nn.Linear, nn.LSTM, nn.GRU}, dtype=torch.qint8)
+model_dtype = next(model.parameters()).dtype
+
 ############################################################
 # create DataPreprocessor from shared_utils
 ############################################################
@@ -46,5 +60,74 @@ input_length = config['model']['window_length']
 fs_in = config.get('data_preprocessor', {}).get('sampling_frequency', 125)
 downsampled_length = int(config['model']['sampling_frequency'] * config['model']['window_length'] / fs_in)
 
+# Downsampling strategy, resolved once. Polyphase (resample_poly) does the
+# rate change with a short FIR instead of the full-window FFT that resample
+# runs every tick; the stream is already lowpassed well under the target
+# Nyquist, so the two agree on this data. Set params.use_polyphase_resample
+# to false to exactly match the FFT resampling used in offline training.
+use_polyphase = bool(params.get('use_polyphase_resample', True))
+if downsampled_length == input_length:
+    def downsample_window(x):
+        return x
+elif use_polyphase:
+    _resample_frac = Fraction(downsampled_length, input_length)
+
+    def downsample_window(x):
+        return resample_poly(x, _resample_frac.numerator, _resample_frac.denominator, axis=0)
+else:
+    def downsample_window(x):
+        return resample(x, downsampled_length, axis=0)
+
+############################################################
+# per-tick inference path
+############################################################
+# On CUDA, capture the fixed-shape forward pass into a CUDA graph once: per
+# tick the window lands in a pinned staging tensor, moves to the graph's
+# static input without blocking, and the whole forward replays as a single
+# graph launch instead of eager per-kernel dispatch. Any model that can't be
+# captured (dynamic shapes, unsupported ops) falls back to eager inference.
+use_cuda_graph = bool(params.get('use_cuda_graph', True)) and device.type == 'cuda'
+
+
+def _eager_infer(window):
+    x = torch.from_numpy(window).to(device=device, dtype=model_dtype, non_blocking=True)
+    return model(x, return_logits=False, return_dataclass=True)
+
+
+def make_decoder_infer(window):
+    '''Build the per-tick inference callable for this window shape.'''
+    if not use_cuda_graph:
+        return _eager_infer
+    try:
+        pinned_in = torch.empty(window.shape, dtype=torch.float32, pin_memory=True)
+        # copy_ casts on device, so the staging tensor stays float32
+        static_in = torch.empty(window.shape, dtype=model_dtype, device=device)
+        # Warm up on a side stream so capture starts from a settled allocator
+        side_stream = torch.cuda.Stream()
+        side_stream.wait_stream(torch.cuda.current_stream())
+        with torch.cuda.stream(side_stream):
+            for _ in range(3):
+                model(static_in, return_logits=False, return_dataclass=True)
+        torch.cuda.current_stream().wait_stream(side_stream)
+
+        graph = torch.cuda.CUDAGraph()
+        with torch.cuda.graph(graph):
+            static_out = model(static_in, return_logits=False, return_dataclass=True)
+
+        def graph_infer(window):
+            pinned_in.copy_(torch.from_numpy(window))
+            static_in.copy_(pinned_in, non_blocking=True)
+            graph.replay()
+            return static_out
+
+        return graph_infer
+    except Exception as e:
+        print(f"decoder: CUDA graph capture failed ({e}); using eager inference")
+        return _eager_infer
+
+
+# Built lazily on the first tick, once the preprocessed window shape is known
+decoder_infer = None
+
 # decoder_output will always be 5 length
 decoder_output[:] = np.zeros(decoder_output.shape)
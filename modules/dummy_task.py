@@ -26,6 +26,12 @@ if not _internal['initialized']:
     _internal['hold_ticks'] = int(params.get('hold_ticks', _internal['hold_ticks']))
     _internal['ticks_left'] = _internal['hold_ticks']
     _internal['amplitude'] = float(params.get('amplitude', _internal['amplitude']))
+    amp = _internal['amplitude']
+    # State -> target table, built once; row 4 (center) doubles as the
+    # fallback for out-of-range states
+    _internal['targets'] = np.array(
+        [[-amp, 0.0], [amp, 0.0], [0.0, amp], [0.0, -amp], [0.0, 0.0]],
+        dtype=np.float32)
     # Initialize outputs
     state_task[:] = np.int8(0)
     decoded_pos[:] = np.float32(0.0)
@@ -41,20 +47,15 @@ if _internal['ticks_left'] <= 0:
     _internal['ticks_left'] = _internal['hold_ticks']
 
 state = int(_internal['seq'][_internal['state_idx']])
-amp = _internal['amplitude']
 
-mapping = {
-    0: np.array([-amp, 0.0], dtype=np.float32),
-    1: np.array([ amp, 0.0], dtype=np.float32),
-    2: np.array([0.0,  amp], dtype=np.float32),
-    3: np.array([0.0, -amp], dtype=np.float32),
-    4: np.array([0.0, 0.0], dtype=np.float32),
-}
-tgt = mapping.get(state, np.array([0.0, 0.0], dtype=np.float32))
+targets = _internal['targets']
+tgt = targets[state] if 0 <= state < len(targets) else targets[4]
 
 state_task[0] = np.int8(state)
 target_pos[:] = tgt
-decoded_pos[:] = 0.8 * decoded_pos + 0.2 * tgt
+# In-place blend toward the target: no per-tick temporaries
+decoded_pos *= np.float32(0.8)
+decoded_pos += np.float32(0.2) * tgt
 game_state[0] = np.int8(1)
 
 if _internal.get('last_printed') != state:
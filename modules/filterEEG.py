@@ -9,12 +9,19 @@ if idx != new_idx:
     # May want to filter sample-by-sample if non-linear filtering is used
     # Preserve last column (continuous counter) unfiltered
     counter_col = data[:, -1].copy()
-    data_filt, zo = scipy.signal.sosfilt(sos, data, axis=0, zi=zi)
+    data_filt, zo = sosfilt_stream(sos, data, zi)
     data_filt[:, -1] = counter_col
     zi = zo
     
     databuffer[new_idx-nSamples:new_idx] = data_filt
-    wrap_inds = (np.arange(new_idx-nSamples, new_idx) - N) % (2*N)
-    databuffer[wrap_inds] = data_filt
+    # Mirror into the other half with contiguous slice writes instead of a
+    # per-sample index array + scattered write. The mirror of row i is
+    # (i - N) % 2N, so the block maps to at most two contiguous runs.
+    start = new_idx - nSamples - N
+    if start >= 0:
+        databuffer[start:start+nSamples] = data_filt
+    else:
+        databuffer[2*N+start:2*N] = data_filt[:-start]
+        databuffer[:new_idx-N] = data_filt[-start:]
     
 idx = new_idx
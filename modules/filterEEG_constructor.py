@@ -1,3 +1,4 @@
+import os
 import numpy as np
 import scipy.signal
 
@@ -5,19 +6,36 @@ import scipy.signal
 Fs = 125.0  # OpenBCI Cyton+Daisy sampling rate
 Fn = [60,60]   # 60Hz notch filter (below Nyquist frequency of 62.5Hz) - removes power line interference
 Q = [10,4]    # Q factor for 60Hz notch filter
-sosNotch = [np.concatenate(scipy.signal.iirnotch(Fn[i], Q[i], fs=Fs)).reshape((1, 6))
-    for i in range(len(Fn))]
 Fc_lower = 4  # bandpass between 4 and 40Hz
 Fc_upper = 40 # bandpass between 4 and 40Hz
-wc_lower = Fc_lower/Fs*2.0
-wc_upper = Fc_upper/Fs*2.0 # Fc cutoff frequency (2x Fc/Fs = Fc/Nyquist)
 
-# lowpass and highpass butterworth filter
-sosLP = scipy.signal.butter(4, wc_upper, btype='lowpass', output='sos')
-sosHP = scipy.signal.butter(5, wc_lower, btype='highpass', output='sos')
+# Filter design (and sosfilt_zi's steady-state solve) is memoized on disk,
+# keyed on the design parameters; cwd is the repo root when RASPy runs.
+_sos_cache = f'modules/.filterEEG_sos_Fs{Fs}_Fn{Fn}_Q{Q}_Fc{Fc_lower}-{Fc_upper}.npz'
+if os.path.exists(_sos_cache):
+    # Close the npz once the arrays are out: an open NpzFile left in the
+    # exec'd module globals leaks its file handle for the process lifetime
+    # and breaks anything that tries to pickle this namespace
+    with np.load(_sos_cache) as _cached:
+        sos = _cached['sos']
+        zi0 = _cached['zi0']
+    del _cached
+else:
+    sosNotch = [np.concatenate(scipy.signal.iirnotch(Fn[i], Q[i], fs=Fs)).reshape((1, 6))
+        for i in range(len(Fn))]
+    wc_lower = Fc_lower/Fs*2.0
+    wc_upper = Fc_upper/Fs*2.0 # Fc cutoff frequency (2x Fc/Fs = Fc/Nyquist)
 
-sos = np.vstack([*sosNotch, sosLP, sosHP])  # add low and high pass filter coefficients
-zi0 = scipy.signal.sosfilt_zi(sos)
+    # lowpass and highpass butterworth filter
+    sosLP = scipy.signal.butter(4, wc_upper, btype='lowpass', output='sos')
+    sosHP = scipy.signal.butter(5, wc_lower, btype='highpass', output='sos')
+
+    sos = np.vstack([*sosNotch, sosLP, sosHP])  # add low and high pass filter coefficients
+    zi0 = scipy.signal.sosfilt_zi(sos)
+    try:
+        np.savez(_sos_cache, sos=sos, zi0=zi0)
+    except OSError:
+        pass  # read-only checkout; just redo the design next run
 
 data_init = np.zeros(17)  # 16 EEG channels + 1 sample counter
 
@@ -25,3 +43,53 @@ zi = None
 
 idx = eegbufferindex[0]
 N = eegbuffersignal.shape[0] // 2
+
+# JIT-compiled streaming SOS filter (direct-form II transposed biquad
+# cascade, identical math to scipy.signal.sosfilt along axis 0). Falls back
+# to scipy if numba is not installed.
+try:
+    import numba
+
+    # No cache=True: RASPy execs this constructor into a bare namespace with
+    # no real module identity, so numba's on-disk cache records an environment
+    # it cannot rebuild and every launch after the first crashes loading it.
+    # The warmup below amortizes the compile per launch instead.
+    @numba.njit
+    def _sosfilt_kernel(sos_, x, zi_):
+        n_sections = sos_.shape[0]
+        n_samples, n_ch = x.shape
+        y = x.copy()
+        for s in range(n_sections):
+            b0 = sos_[s, 0]
+            b1 = sos_[s, 1]
+            b2 = sos_[s, 2]
+            a1 = sos_[s, 4]
+            a2 = sos_[s, 5]
+            for c in range(n_ch):
+                z0 = zi_[s, 0, c]
+                z1 = zi_[s, 1, c]
+                for i in range(n_samples):
+                    xn = y[i, c]
+                    yn = b0*xn + z0
+                    z0 = b1*xn - a1*yn + z1
+                    z1 = b2*xn - a2*yn
+                    y[i, c] = yn
+                zi_[s, 0, c] = z0
+                zi_[s, 1, c] = z1
+        return y
+
+    def sosfilt_stream(sos_, x, zi_):
+        zf = zi_.copy()
+        y = _sosfilt_kernel(sos_, np.ascontiguousarray(x), zf)
+        return y, zf
+
+    # Warm up the JIT here so the first loop tick doesn't pay compilation
+    # cost. Dtypes must match the loop exactly — the ring slice is float32
+    # (per the model YAML signal declaration) and zi comes out of the zi0
+    # matmul as float64 — or numba compiles a second specialization on the
+    # first real tick, which is the latency spike this warmup exists to avoid.
+    sosfilt_stream(sos, np.zeros((2, 17), dtype=np.float32),
+                   zi0[..., None] @ np.zeros((1, 17), dtype=np.float32))
+except ImportError:
+    def sosfilt_stream(sos_, x, zi_):
+        return scipy.signal.sosfilt(sos_, x, axis=0, zi=zi_)
@@ -32,6 +32,88 @@ except Exception as e:
     sys.exit(2)
 
 
+try:
+    import numba
+
+    @numba.njit(cache=True)
+    def _counter_step_kernel(col, counts):
+        # counts has 513 slots: diffs in [-256, 255] at d+256, overflow at 512
+        for i in range(1, col.size):
+            d = np.int64(col[i]) - np.int64(col[i - 1])
+            if -256 <= d < 256:
+                counts[d + 256] += 1
+            else:
+                counts[512] += 1
+
+    def counter_step_hist(col):
+        '''One streaming pass over the counter column: no diff temporary, no
+        sort. The diff set is tiny ({1}, or {step, wrap}), so a small fixed
+        table covers it.'''
+        counts = np.zeros(513, dtype=np.int64)
+        _counter_step_kernel(col, counts)
+        step_map = {int(i - 256): int(counts[i]) for i in np.flatnonzero(counts[:512])}
+        if counts[512]:
+            step_map['other'] = int(counts[512])
+        return step_map
+
+    @numba.njit(cache=True, parallel=True, fastmath=True)
+    def _mean_std_kernel(sig, n_ch, means, stds):
+        n = sig.shape[0]
+        for c in numba.prange(n_ch):
+            s = 0.0
+            s2 = 0.0
+            for i in range(n):
+                v = np.float64(sig[i, c])
+                s += v
+                s2 += v * v
+            m = s / n
+            means[c] = m
+            var = s2 / n - m * m
+            stds[c] = np.sqrt(var) if var > 0.0 else 0.0
+
+    def channel_mean_std(sig, n_ch=16):
+        '''Per-channel mean and std in one fused read of the data: one lane
+        per channel keeps sum and sum-of-squares accumulators, halving the
+        bytes moved versus separate mean() and std() passes.'''
+        means = np.empty(n_ch)
+        stds = np.empty(n_ch)
+        _mean_std_kernel(sig, n_ch, means, stds)
+        return means, stds
+
+    @numba.njit(cache=True)
+    def count_transitions(st):
+        '''Fused neighbor-compare reduction: one pass and one accumulator
+        versus the diff array, bool array, and sum of np.diff(st) != 0.'''
+        n = 0
+        for i in range(1, st.size):
+            n += st[i] != st[i - 1]
+        return n
+
+    @numba.njit(cache=True)
+    def is_nondecreasing(a):
+        '''Single read with early exit on the first violation — no diff or
+        bool temporaries like np.all(np.diff(a) >= 0) builds.'''
+        for i in range(1, a.size):
+            if a[i] < a[i - 1]:
+                return False
+        return True
+
+except ImportError:
+    def counter_step_hist(col):
+        diffs = np.diff(col.astype(np.int64))
+        unique, counts = np.unique(diffs, return_counts=True)
+        return {int(u): int(c) for u, c in zip(unique, counts)}
+
+    def channel_mean_std(sig, n_ch=16):
+        return sig[:, :n_ch].mean(axis=0), sig[:, :n_ch].std(axis=0)
+
+    def count_transitions(st):
+        return int(np.count_nonzero(st[1:] != st[:-1]))
+
+    def is_nondecreasing(a):
+        return bool(np.all(a[1:] >= a[:-1]))
+
+
 def human_bytes(n):
     for unit in ['B','KB','MB','GB','TB']:
         if n < 1024:
@@ -44,22 +126,35 @@ def list_sessions(data_dir):
     base = os.path.join(data_dir, 'raspy')
     if not os.path.isdir(base):
         return []
-    return sorted(
-        [os.path.join(base, d) for d in os.listdir(base) if d.startswith('exp_')],
-        key=lambda p: os.path.getmtime(p)
-    )
+    # scandir's DirEntry carries stat info from the directory read, so this
+    # avoids a separate getmtime stat call per exp_* folder
+    with os.scandir(base) as it:
+        entries = [(e.stat().st_mtime, e.path)
+                   for e in it if e.name.startswith('exp_') and e.is_dir()]
+    return [p for _, p in sorted(entries)]
 
 
 def rate_from_time_ns(ts):
     if len(ts) < 3:
         return 0.0
-    diffs = np.diff(ts.astype(np.int64)) / 1e9  # seconds
+    # Stay in integer nanoseconds (no float64 copy of the whole diff array)
+    # and select just the middle element(s) with np.partition instead of
+    # paying np.median's full machinery; convert to seconds only at the end.
+    diffs = np.diff(np.asarray(ts, dtype=np.int64))
     diffs = diffs[diffs > 0]
-    if len(diffs) == 0:
+    n = diffs.size
+    if n == 0:
         return 0.0
-    med = np.median(diffs)
-    mean = np.mean(diffs)
-    return 1.0/med if med > 0 else (1.0/mean if mean > 0 else 0.0)
+    k = (n - 1) // 2
+    if n % 2:
+        med_ns = float(np.partition(diffs, k)[k])
+    else:
+        part = np.partition(diffs, (k, k + 1))
+        med_ns = 0.5 * (float(part[k]) + float(part[k + 1]))
+    if med_ns > 0:
+        return 1e9 / med_ns
+    mean_ns = float(diffs.mean())
+    return 1e9 / mean_ns if mean_ns > 0 else 0.0
 
 
 def print_header(title):
@@ -72,36 +167,49 @@ def analyze(session_dir):
     # Validate presence of files
     task_path = os.path.join(session_dir, 'task.bin')
     eeg_path = os.path.join(session_dir, 'eeg.bin')
-    if not os.path.isfile(task_path) or not os.path.isfile(eeg_path):
+    # One stat per file covers both the existence check and the size report
+    try:
+        st_task = os.stat(task_path)
+        st_eeg = os.stat(eeg_path)
+    except OSError:
         print('[FAIL] Missing task.bin or eeg.bin in', session_dir)
         sys.exit(2)
     print_header('Files')
-    print('task.bin:', human_bytes(os.path.getsize(task_path)))
-    print('eeg.bin :', human_bytes(os.path.getsize(eeg_path)))
+    print('task.bin:', human_bytes(st_task.st_size))
+    print('eeg.bin :', human_bytes(st_eeg.st_size))
 
-    # Load streams
+    # Load streams (mmap-backed: fields are demand-paged views, so only the
+    # columns we actually touch are read off disk)
     print_header('Load Streams')
-    task = su.read_data_file_to_dict(task_path)
-    eeg = su.read_data_file_to_dict(eeg_path)
-    print('Loaded task keys:', list(task.keys()))
-    print('Loaded eeg keys :', list(eeg.keys()))
+    task = su.read_data_file_mmap(task_path)
+    eeg = su.read_data_file_mmap(eeg_path)
+    print('Loaded task keys:', [k for k in task.keys() if k != '_mmap'])
+    print('Loaded eeg keys :', [k for k in eeg.keys() if k != '_mmap'])
 
-    # Task stats
+    # Task stats. Cast the int columns once: every later use shares these
+    # views/copies instead of re-running astype per block.
+    st = np.asarray(task['state_task'], dtype=np.int64).ravel() if 'state_task' in task else None
+    es = np.asarray(task['eeg_step'], dtype=np.int64).ravel() if 'eeg_step' in task else None
+    n_states = 0
     print_header('Task Stream')
     tn = task['time_ns']
     t_rate = rate_from_time_ns(tn)
     print(f'Task rows: {len(tn)}, approx rate: {t_rate:.2f} Hz')
-    if 'state_task' in task:
-        st = task['state_task'].astype(int)
-        vals, cnts = np.unique(st, return_counts=True)
-        print('state_task distribution:', dict(zip(vals.tolist(), cnts.tolist())))
+    if st is not None:
+        # Small bounded-int alphabet: bincount is one O(N) pass, no sort.
+        # Offset by the minimum so negative idle states (-1) index cleanly.
+        lo = int(st.min()) if st.size else 0
+        cnts_all = np.bincount(st - lo)
+        vals = np.flatnonzero(cnts_all)
+        n_states = len(vals)
+        print('state_task distribution:',
+              dict(zip((vals + lo).tolist(), cnts_all[vals].tolist())))
         # transitions
         if len(st) > 1:
-            n_trans = int(np.sum(np.diff(st) != 0))
+            n_trans = int(count_transitions(st))
             print('state_task transitions:', n_trans)
-    if 'eeg_step' in task:
-        es = task['eeg_step'].astype(int)
-        mono = np.all(np.diff(es) >= 0)
+    if es is not None:
+        mono = is_nondecreasing(es)
         print('eeg_step monotonic:', bool(mono), 'min(max):', int(es.min()) if len(es) else 0, int(es.max()) if len(es) else 0)
 
     # EEG stats
@@ -109,30 +217,23 @@ def analyze(session_dir):
     en = eeg['time_ns']
     e_rate = rate_from_time_ns(en)
     print(f'EEG rows: {len(en)}, approx rate: {e_rate:.2f} Hz')
-    # Convert structured (N, 17) fields to ndarray
-    try:
-        sig = np.vstack(eeg['eegbuffersignal'])  # (N, 17)
-        dbf = np.vstack(eeg['databuffer'])       # (N, 17)
-        print('eegbuffersignal shape:', sig.shape, 'databuffer shape:', dbf.shape)
-        # channel stats (first 16 columns)
-        ch_mean = sig[:, :16].mean(axis=0)
-        ch_std = sig[:, :16].std(axis=0)
-        print('EEG ch mean (first 8):', np.round(ch_mean[:8], 6).tolist())
-        print('EEG ch std  (first 8):', np.round(ch_std[:8], 6).tolist())
-        # Counter step summary
-        if sig.shape[1] >= 17:
-            diffs = np.diff(sig[:, -1].astype(np.int64))
-            if diffs.size:
-                unique, counts = np.unique(diffs, return_counts=True)
-                step_map = {int(u): int(c) for u, c in zip(unique, counts)}
-                print('Last-column counter diff histogram (top):', step_map)
-    except Exception as e:
-        print('[WARN] Could not stack eegbuffersignal/databuffer:', e)
+    # The structured fields are already (N, 17) blocks (views with the mmap
+    # loader), so no vstack copy is needed
+    sig = eeg['eegbuffersignal']  # (N, 17)
+    dbf = eeg['databuffer']       # (N, 17)
+    print('eegbuffersignal shape:', sig.shape, 'databuffer shape:', dbf.shape)
+    # channel stats (first 16 columns, fused single pass)
+    ch_mean, ch_std = channel_mean_std(sig)
+    print('EEG ch mean (first 8):', np.round(ch_mean[:8], 6).tolist())
+    print('EEG ch std  (first 8):', np.round(ch_std[:8], 6).tolist())
+    # Counter step summary (single streaming pass; no diff array, no sort)
+    if sig.shape[1] >= 17 and sig.shape[0] > 1:
+        step_map = counter_step_hist(sig[:, -1])
+        print('Last-column counter diff histogram (top):', step_map)
 
     # Cross-stream endpoint sanity
     print_header('Cross-Stream Alignment')
-    if 'eeg_step' in task:
-        es = task['eeg_step'].astype(int)
+    if es is not None:
         last_es = int(es.max()) if len(es) else 0
         n_eeg = len(eeg['time_ns'])
         print('task.eeg_step last:', last_es, '| EEG rows:', n_eeg, '| diff:', n_eeg - last_es)
@@ -142,7 +243,10 @@ def analyze(session_dir):
     print_header('Summary')
     print('- Task and EEG streams loaded and parsed')
     print('- Task rate ~{:.2f} Hz, EEG rate ~{:.2f} Hz'.format(t_rate, e_rate))
-    print('- state_task present with {} unique values'.format(len(np.unique(task['state_task'].astype(int))) if 'state_task' in task else 0))
+    if st is not None:
+        print('- state_task present with {} unique values'.format(n_states))
+    else:
+        print('- state_task absent from task stream')
     print('- Counter column is diagnostic only; offline pipeline strips it for openbci16')
 
 
@@ -4,28 +4,23 @@ Convenience runner for the BrainFlow playback demo.
 """
 import os
 import sys
-import subprocess
 
-REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import run_model
+
 
 def main():
-    cmd = [
-        sys.executable, "-u",
-        os.path.join(REPO_ROOT, "scripts", "run_model.py"),
+    # Delegate to run_model in-process with the demo defaults: no child
+    # interpreter to bootstrap, just an argv swap and a function call
+    sys.argv = [
+        "run_model.py",
         "--model", "exp/demo_openbci_playback",
         "--save", "True",
         "--logfile", "True",
     ]
     print("Launching demo:")
-    print(" ", " ".join(cmd))
-    proc = subprocess.Popen(cmd, cwd=REPO_ROOT)
-    try:
-        proc.wait()
-    except KeyboardInterrupt:
-        proc.terminate()
-        proc.wait()
-    sys.exit(proc.returncode)
+    print(" ", " ".join(sys.argv))
+    run_model.main()
 
 if __name__ == "__main__":
     main()
-
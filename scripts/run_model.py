@@ -13,12 +13,18 @@ Examples:
 Notes:
   - This is a thin wrapper around main/main.py to make launching consistent.
   - It does not modify YAMLs; ensure ports/paths in your YAML are valid.
+  - main.py runs in-process (runpy), so there is no child interpreter to
+    bootstrap and no fork/exec at the launcher level. If subprocess isolation
+    is ever reinstated, avoid preexec_fn or a custom env in the Popen call:
+    either forces CPython off its posix_spawn fast path back to fork+exec,
+    which copies the parent's page tables (expensive once numpy/scipy are
+    imported).
 """
 
 import argparse
 import os
+import runpy
 import sys
-import subprocess
 from datetime import datetime
 
 REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
@@ -47,39 +53,47 @@ def main():
         print(f"Error: YAML not found: {yaml_path}")
         sys.exit(2)
 
-    # Build command
-    cmd = [
-        sys.executable, "-u",
-        os.path.join(REPO_ROOT, "main", "main.py"),
+    # Run main.py in this interpreter instead of Popen-ing a fresh one: the
+    # child would spend its first few hundred ms on interpreter bootstrap and
+    # re-importing numpy/scipy before doing any work
+    main_path = os.path.join(REPO_ROOT, "main", "main.py")
+    sys.argv = [
+        main_path,
         args.model,
         "--save", args.save,
         "--logfile", args.logfile,
         "--module_args", args.module_args,
     ]
     if args.overwrite_params:
-        cmd.append("-overwrite_params")
+        sys.argv.append("-overwrite_params")
     if args.data_folder is not None:
-        cmd.extend(["--data_folder", args.data_folder])
+        sys.argv.extend(["--data_folder", args.data_folder])
 
     print("Launching:")
-    print(" ", " ".join(cmd))
+    print(" ", " ".join(sys.argv))
     print("")
 
     # Run from repo root to match main.py expectations
-    proc = subprocess.Popen(cmd, cwd=REPO_ROOT)
+    os.chdir(REPO_ROOT)
+    returncode = 0
     try:
-        proc.wait()
+        runpy.run_path(main_path, run_name="__main__")
+    except SystemExit as e:
+        if isinstance(e.code, int):
+            returncode = e.code
+        elif e.code is not None:
+            print(e.code)
+            returncode = 1
     except KeyboardInterrupt:
-        proc.terminate()
-        proc.wait()
+        returncode = 130
 
     # Surface common failure due to known group_params issue for quick diagnosis
-    if proc.returncode != 0:
-        print(f"main exited with code {proc.returncode}")
+    if returncode != 0:
+        print(f"main exited with code {returncode}")
         print("If you see a TypeError about 'dict_keys' being not subscriptable,\n"
               "it is caused by group_params handling in main/main.py.\n"
               "We can fix that separately.")
-    sys.exit(proc.returncode)
+    sys.exit(returncode)
 
 
 if __name__ == "__main__":
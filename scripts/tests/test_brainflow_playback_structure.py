@@ -39,7 +39,9 @@ def main():
 
     board.prepare_session()
     board.config_board("loopback_false")  # don't loop file
-    board.start_stream()
+    # Explicit ring capacity (1 s is ample for the 0.1 s accrual below) so
+    # BrainFlow never grows its internal buffer mid-stream
+    board.start_stream(max(1, int(sampling_rate * 1)))
 
     time.sleep(0.1)  # let some data accrue
 
@@ -50,7 +52,11 @@ def main():
     print("Data shape [channels x samples] =", data_2d.shape)
     assert data_2d.ndim == 2 and data_2d.shape[0] > 0 and data_2d.shape[1] > 0
 
-    eeg_data = data_2d[eeg_channels, :].T
+    # EEG rows are contiguous on Cyton Daisy, so slice (a view) rather than
+    # fancy-index, and lay the window out C-contiguous samples x channels —
+    # the layout downstream consumers iterate over
+    rows = slice(eeg_channels[0], eeg_channels[0] + len(eeg_channels))
+    eeg_data = np.ascontiguousarray(data_2d[rows].T)
     sample_counters = data_2d[package_num_channel, :]
     brainflow_ts = data_2d[timestamp_channel, :]
 
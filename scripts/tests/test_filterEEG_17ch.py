@@ -2,28 +2,103 @@
 """
 Unit check: verify filterEEG math works for 17 channels (16 EEG + 1 extra).
 Mirrors modules/filterEEG_constructor.py and modules/filterEEG.py behavior.
+
+Also validates a Numba SOS cascade kernel against scipy. The three sosfilt
+calls below run on tiny blocks (10/5/1 samples), where the cost is scipy's
+per-call dispatch, not FLOPs; the kernel runs the biquad cascade directly on
+the (T, 17) block with one independent state machine per channel.
 """
 import numpy as np
 import scipy.signal
 
-def main():
-    print("="*60)
-    print("TEST: filterEEG 17-channel compatibility")
-    print("="*60)
 
-    # Match constructor
+def _design_sos():
+    '''Same cascade as modules/filterEEG_constructor.py: two 60 Hz notches,
+    4th-order lowpass at 40 Hz, 5th-order highpass at 4 Hz, at Fs=125.'''
     Fs = 125.0
     Fn = [60, 60]
     Q = [10, 4]
     sosNotch = [np.concatenate(scipy.signal.iirnotch(Fn[i], Q[i], fs=Fs)).reshape((1, 6))
                 for i in range(len(Fn))]
-    Fc_lower = 4
-    Fc_upper = 40
-    wc_lower = Fc_lower/Fs*2.0
-    wc_upper = Fc_upper/Fs*2.0
+    wc_lower = 4 / Fs * 2.0
+    wc_upper = 40 / Fs * 2.0
     sosLP = scipy.signal.butter(4, wc_upper, btype='lowpass', output='sos')
     sosHP = scipy.signal.butter(5, wc_lower, btype='highpass', output='sos')
     sos = np.vstack([*sosNotch, sosLP, sosHP])
+    # a0-normalize so the kernels can skip the division (scipy does the same)
+    return sos / sos[:, [3]]
+
+
+# Designed once at import: re-running main() in a tight loop pays no
+# iirnotch/butter/vstack setup per call
+SOS = _design_sos()
+
+try:
+    import numba
+
+    @numba.njit(cache=True, parallel=True, fastmath=True)
+    def sosfilt_soa(sos, x, zi):
+        '''Transposed direct-form II biquad cascade on a (T, n_ch) block.
+        Matches scipy.signal.sosfilt(sos, x, axis=0, zi=zi); zi has scipy's
+        (n_sections, 2, n_ch) layout and is updated in place. Channels are
+        independent, so prange distributes them across cores.'''
+        n, n_ch = x.shape
+        n_sec = sos.shape[0]
+        y = np.empty_like(x)
+        for ch in numba.prange(n_ch):
+            for i in range(n):
+                v = x[i, ch]
+                for s in range(n_sec):
+                    w = sos[s, 0] * v + zi[s, 0, ch]
+                    zi[s, 0, ch] = sos[s, 1] * v - sos[s, 4] * w + zi[s, 1, ch]
+                    zi[s, 1, ch] = sos[s, 2] * v - sos[s, 5] * w
+                    v = w
+                y[i, ch] = v
+        return y
+
+    @numba.njit(cache=True)
+    def sosfilt_zi_const(sos):
+        '''Analytic steady-state initial conditions for an a0-normalized SOS
+        cascade — the closed-form 2x2 solve scipy.signal.sosfilt_zi does via
+        lfilter_zi, without the scipy dispatch.'''
+        n_sec = sos.shape[0]
+        zi = np.empty((n_sec, 2))
+        scale = 1.0
+        for s in range(n_sec):
+            b0, b1, b2 = sos[s, 0], sos[s, 1], sos[s, 2]
+            a1, a2 = sos[s, 4], sos[s, 5]
+            r0 = b1 - a1 * b0
+            r1 = b2 - a2 * b0
+            det = 1.0 + a1 + a2
+            zi[s, 0] = scale * (r0 + r1) / det
+            zi[s, 1] = scale * ((1.0 + a1) * r1 - a2 * r0) / det
+            scale *= (b0 + b1 + b2) / det
+        return zi
+
+    @numba.njit(cache=True)
+    def expand_zi(zi0, x0):
+        '''Broadcast per-section zi across channels, scaled by the first
+        sample — the (zi0[..., None] @ x0.reshape(1, -1)) matmul as a plain
+        fill of the (n_sections, 2, n_ch) state block.'''
+        n_sec = zi0.shape[0]
+        n_ch = x0.size
+        zi = np.empty((n_sec, 2, n_ch))
+        for s in range(n_sec):
+            for j in range(2):
+                for c in range(n_ch):
+                    zi[s, j, c] = zi0[s, j] * x0[c]
+        return zi
+except ImportError:
+    sosfilt_soa = None
+
+
+def main():
+    print("="*60)
+    print("TEST: filterEEG 17-channel compatibility")
+    print("="*60)
+
+    # Match constructor (designed once at module level)
+    sos = SOS
     zi0 = scipy.signal.sosfilt_zi(sos)
 
     # Simulate data
@@ -35,6 +110,7 @@ def main():
     # First call initializes internal state like filterEEG
     data_init = x1[0]
     zi = (zi0[..., None] @ data_init.reshape((1, -1)))
+    zi_soa = zi.copy()
     y1, zi = scipy.signal.sosfilt(sos, x1, axis=0, zi=zi)
 
     # Subsequent calls reuse state
@@ -46,6 +122,29 @@ def main():
     assert y1.shape == x1.shape and y2.shape == x2.shape and y3.shape == x3.shape
     print("✅ filterEEG compatibility PASS (shape & state propagation)")
 
+    if sosfilt_soa is None:
+        print("⚠️  numba not installed; skipping sosfilt_soa kernel check")
+        return
+
+    # Analytic zi kernels vs scipy
+    zi0_k = sosfilt_zi_const(sos)
+    assert np.allclose(zi0_k, zi0, rtol=1e-10, atol=1e-12), \
+        f"sosfilt_zi_const mismatch: max err {np.abs(zi0_k - zi0).max()}"
+    zi_exp = expand_zi(zi0_k, data_init)
+    assert np.allclose(zi_exp, zi0[..., None] @ data_init.reshape((1, -1)),
+                       rtol=1e-10, atol=1e-12), "expand_zi mismatch"
+    print("✅ sosfilt_zi_const / expand_zi PASS (match scipy.signal.sosfilt_zi)")
+
+    # Same three-block run through the kernel, same initial state
+    s1 = sosfilt_soa(sos, x1, zi_soa)
+    s2 = sosfilt_soa(sos, x2, zi_soa)
+    s3 = sosfilt_soa(sos, x3, zi_soa)
+    for ys, yk, tag in [(y1, s1, 'y1'), (y2, s2, 'y2'), (y3, s3, 'y3')]:
+        assert np.allclose(ys, yk, rtol=1e-8, atol=1e-10), \
+            f"sosfilt_soa mismatch on {tag}: max err {np.abs(ys - yk).max()}"
+    assert np.allclose(zi, zi_soa, rtol=1e-8, atol=1e-10), \
+        f"sosfilt_soa final state mismatch: max err {np.abs(zi - zi_soa).max()}"
+    print("✅ sosfilt_soa kernel PASS (matches scipy.signal.sosfilt output & state)")
+
 if __name__ == "__main__":
     main()
-
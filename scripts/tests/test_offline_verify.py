@@ -17,6 +17,7 @@ import sys
 import glob
 import argparse
 import h5py
+import numpy as np
 try:
     import torch
     from torch.utils.data import DataLoader
@@ -33,19 +34,63 @@ if HAS_TORCH:
     from Offline_EEGNet.EEGNet import EEGNet
 
 
+try:
+    import numba
+
+    @numba.njit(cache=True)
+    def _transition_scan(st, k):
+        n = 0
+        first = np.empty(k, dtype=np.int64)
+        last = np.empty(k, dtype=np.int64)
+        for i in range(1, st.size):
+            if st[i] != st[i - 1]:
+                if n < k:
+                    first[n] = i
+                last[n % k] = i
+                n += 1
+        return n, first, last
+
+    def transition_summary(st, k=10):
+        '''Count state transitions and collect the first/last k indices in
+        one pass, without materializing the full flatnonzero(diff) index
+        array. Tail indices come from a length-k ring.'''
+        n, first, last = _transition_scan(np.ascontiguousarray(st), k)
+        head = first[:min(n, k)].tolist()
+        if n <= k:
+            return n, head, list(head)
+        start = n % k
+        tail = last[start:].tolist() + last[:start].tolist()
+        return n, head, tail
+except ImportError:
+    def transition_summary(st, k=10):
+        idx = np.flatnonzero(np.diff(st)) + 1
+        return len(idx), idx[:k].tolist(), idx[-k:].tolist()
+
+
+def _has_logs(sess_path: str) -> bool:
+    # One scandir per candidate instead of two isfile stat probes
+    try:
+        with os.scandir(sess_path) as it:
+            names = {e.name for e in it}
+    except OSError:
+        return False
+    return 'eeg.bin' in names and 'task.bin' in names
+
+
 def pick_session(exp_name: str | None) -> str:
     data_dir = os.path.join(REPO, 'data', 'raspy')
     if exp_name:
         sess_path = os.path.join(data_dir, exp_name)
         if not os.path.isdir(sess_path):
             raise FileNotFoundError(f"Session not found: {sess_path}")
-        if not (os.path.isfile(os.path.join(sess_path, 'eeg.bin')) and os.path.isfile(os.path.join(sess_path, 'task.bin'))):
+        if not _has_logs(sess_path):
             raise FileNotFoundError(f"Session missing eeg.bin/task.bin: {sess_path}")
         return exp_name
-    sessions = sorted([d for d in os.listdir(data_dir) if d.startswith('exp_')])
+    # One directory scan instead of listdir plus per-folder isdir stats
+    with os.scandir(data_dir) as it:
+        sessions = sorted(e.name for e in it if e.name.startswith('exp_') and e.is_dir())
     for sess in reversed(sessions):
-        sess_path = os.path.join(data_dir, sess)
-        if os.path.isfile(os.path.join(sess_path, 'eeg.bin')) and os.path.isfile(os.path.join(sess_path, 'task.bin')):
+        if _has_logs(os.path.join(data_dir, sess)):
             return sess
     raise FileNotFoundError(f"No exp_* folder with eeg.bin/task.bin found in {data_dir}")
 
@@ -67,19 +112,21 @@ def main():
     # Debug: print unique states in task data
     task_path = os.path.join(REPO, 'data', 'raspy', sess, 'task.bin')
     try:
-        task_dict = utils.read_data_file_to_dict(task_path)
-        import numpy as np
-        states = np.asarray(task_dict['state_task']).astype(int)
+        # mmap-backed view: only the state_task column is materialized, and
+        # create_dataset below re-reads the file anyway, so skip the full
+        # read_data_file_to_dict parse here
+        task_dict = utils.read_data_file_mmap(task_path)
+        states = np.asarray(task_dict['state_task'], dtype=int)
         uniq, counts = np.unique(states, return_counts=True)
         print('State distribution in task.bin:', dict(zip(uniq.tolist(), counts.tolist())))
         print('Total ticks:', len(states))
         print('First 20 states:', states[:20].tolist())
         print('Last 20 states:', states[-20:].tolist())
-        state_changes = np.flatnonzero(np.diff(states.flatten())) + 1
-        print('Number of transitions:', len(state_changes))
-        print('First 10 transition indices:', state_changes[:10].tolist())
-        if len(state_changes) > 10:
-            print('Last 10 transition indices:', state_changes[-10:].tolist())
+        n_trans, first_idx, last_idx = transition_summary(states.flatten())
+        print('Number of transitions:', n_trans)
+        print('First 10 transition indices:', first_idx)
+        if n_trans > 10:
+            print('Last 10 transition indices:', last_idx)
     except Exception as e:
         print('Warning: could not inspect task.bin states:', e)
 
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Unit check: online-mode normalization in DataPreprocessor is truly incremental.
+Guards against the first_run flag never being cleared (which would rebuild the
+Welfords normalizer on every call and re-scan the window instead of updating).
+"""
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..',
+                                'Offline_EEGNet', 'shared_utils'))
+from preprocessor import DataPreprocessor, Welfords
+
+
+def main():
+    print("=" * 60)
+    print("TEST: online normalizer updates incrementally")
+    print("=" * 60)
+
+    config = {
+        'eeg_cap_type': 'openbci16',
+        'ch_to_drop': [],
+        'bandpass_filter': {'apply': False, 'lowcut': 4, 'highcut': 40, 'order': 4},
+        'apply_laplacian': False,
+        'sampling_frequency': 125,
+        'online_status': 'online',
+        'normalizer_type': 'welfords',
+    }
+    preprocessor = DataPreprocessor(config)
+
+    rng = np.random.default_rng(0)
+    x1 = rng.standard_normal((10, 16)).astype(np.float32) + 1.0
+    x2 = rng.standard_normal((5, 16)).astype(np.float32) + 1.0
+
+    preprocessor.preprocess(x1)
+    assert preprocessor.first_run is False, "first_run not cleared after first call"
+    normalizer = preprocessor.normalizer
+    n_after_first = normalizer.n
+    assert n_after_first == x1.shape[0]
+
+    preprocessor.preprocess(x2)
+    assert preprocessor.normalizer is normalizer, "normalizer was re-instantiated"
+    assert preprocessor.normalizer.n > n_after_first, "sample count reset instead of growing"
+    assert preprocessor.normalizer.n == x1.shape[0] + x2.shape[0]
+    print(f"Sample count: {n_after_first} → {preprocessor.normalizer.n}")
+
+    # Running stats must match a batch Welfords over everything seen so far
+    reference = Welfords(np.vstack([x1, x2]), update_mean=True)
+    assert np.allclose(preprocessor.normalizer.mean, reference.mean, atol=1e-5)
+    assert np.allclose(preprocessor.normalizer.std, reference.std, atol=1e-5)
+    print("✅ online normalizer incremental update PASS")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,14 +9,45 @@ Performs static checks to catch missing params and bad signal references
 before launching the full pipeline. Does NOT open hardware or spawn processes.
 """
 
+import os
 import sys
+import pickle
 import argparse
 import yaml
+try:
+    # libyaml parser when available (~10x faster, same safe schema)
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
 
 
 def load_yaml(path):
+    '''Parse a model YAML, memoized to a shadow <path>.pkl keyed on the
+    YAML's (mtime, size). These scripts run before every launch, and for an
+    unchanged YAML a binary pickle load is far cheaper than a re-parse. A
+    stale, unreadable, or unwritable cache silently falls back to parsing.'''
+    cache = path + '.pkl'
+    try:
+        st = os.stat(path)
+        key = (st.st_mtime_ns, st.st_size)
+        with open(cache, 'rb') as f:
+            cached_key, model = pickle.load(f)
+        if cached_key == key:
+            return model
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        pass
     with open(path, 'r') as f:
-        return yaml.safe_load(f)
+        model = yaml.load(f, Loader=SafeLoader)
+    try:
+        st = os.stat(path)
+        tmp = cache + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(((st.st_mtime_ns, st.st_size), model), f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, cache)  # atomic: readers never see a partial cache
+    except OSError:
+        pass
+    return model
 
 
 def fail(msg):
@@ -95,6 +126,13 @@ def validate_updateeeg(mod):
     ok('UpdateEEG configuration looks sane')
 
 
+# Required-key sets hashed once; set difference reports every missing key in
+# one shot instead of failing on the first lookup
+_SJ_DIRECTIONS = frozenset(('left', 'right', 'up', 'down'))
+_SJ_LABELS = frozenset(('left', 'right', 'up', 'down', 'still'))
+_SJ_VEL_KEYS = frozenset(range(5))
+
+
 def validate_sj(mod):
     params = mod.get('params', {})
     # Direct-indexed mandatory keys in initParamWithYaml
@@ -112,23 +150,25 @@ def validate_sj(mod):
         fail(f"SJ_4_directions.params missing mandatory keys: {missing}")
     # targetsInfo minimal shape
     ti = params['targetsInfo']
-    if not isinstance(ti, dict) or not all(k in ti for k in ('left','right','up','down')):
+    if not isinstance(ti, dict) or not _SJ_DIRECTIONS <= ti.keys():
         fail('SJ targetsInfo must include left/right/up/down entries')
     for k, v in ti.items():
         if isinstance(v, str):
             continue
         if not (isinstance(v, list) and len(v) == 2 and len(v[0]) == 2 and len(v[1]) == 2):
             fail(f"targetsInfo['{k}'] must be [[x,y],[w,h]]")
-    # decodedVel indices 0..4
+    # decodedVel indices 0..4 — normalize int/str keys once instead of probing
+    # both spellings per index
     dv = params['decodedVel']
-    for i in range(5):
-        if i not in dv and str(i) not in dv:
-            fail(f'decodedVel must include key {i}')
+    dv_keys = {int(k) if str(k).isdigit() else k for k in dv}
+    missing = _SJ_VEL_KEYS - dv_keys
+    if missing:
+        fail(f'decodedVel must include keys {sorted(missing)}')
     # labels present
     t2s = params['target2state_task']
-    for lbl in ('left','right','up','down','still'):
-        if lbl not in t2s:
-            fail(f"target2state_task missing '{lbl}'")
+    missing = _SJ_LABELS - t2s.keys()
+    if missing:
+        fail(f"target2state_task missing {sorted(missing)}")
     ok('SJ_4_directions mandatory params validated')
 
 
@@ -15,11 +15,9 @@ Usage:
 import argparse
 import os
 import sys
-import yaml
-try:
-    from yaml import CLoader as Loader
-except Exception:
-    from yaml import Loader
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from validate_model import load_yaml
 
 
 REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -35,8 +33,8 @@ def main():
         print(f"Error: YAML not found: {yaml_path}")
         sys.exit(2)
 
-    with open(yaml_path, "r") as f:
-        y = yaml.load(f, Loader=Loader)
+    # Memoized parse: shadow .pkl cache keyed on the YAML's mtime/size
+    y = load_yaml(yaml_path)
 
     signals = y.get("signals", {})
     modules = y.get("modules", {})